@@ -0,0 +1,308 @@
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+from prioritized_replay import PrioritizedReplayBuffer
+from q_inference import QNetwork
+from replay_buffer import ReplayBuffer
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+class ReplayShards:
+    def __init__(self, buffers):
+        # One replay buffer per actor: a buffer takes next_obs from the next row of the same env,
+        # so every actor appends its batches to its own buffer. Batches are drawn from all of them
+        # as if they were one buffer; a transition is addressed by its buffer's offset + its index.
+        self.buffers = buffers
+        self.prioritized = isinstance(buffers[0], PrioritizedReplayBuffer)
+        sizes = [b.capacity * b.n_envs for b in buffers]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    def __len__(self):
+        return sum(len(b) for b in self.buffers)
+
+    def add(self, shard, obs, actions, rewards, dones):
+        self.buffers[shard].add(obs, actions, rewards, dones)
+
+    def sample(self, batch_size, beta=0.4, rng=None):
+        # obs, action, next_obs, reward, done, importance-sampling weights, indices. With prioritized
+        # buffers a shard is picked with probability (its priority total) / (sum of the totals), so
+        # a transition is drawn with probability p_i / sum_k p_k over all shards, as in one buffer.
+        rng = rng or np.random.default_rng()
+        if self.prioritized:
+            mass = np.array([b.priorities.total() for b in self.buffers])
+        else:
+            mass = np.array([len(b) for b in self.buffers], dtype=np.float64)
+        counts = rng.multinomial(batch_size, mass / mass.sum())
+        parts, indices, probs = [], [], []
+        for shard, (b, k) in enumerate(zip(self.buffers, counts)):
+            if k == 0:
+                continue
+            local = b.sample_indices(k, rng)
+            parts.append(b.get(local))
+            indices.append(local + self.offsets[shard])
+            if self.prioritized:
+                probs.append(b.priorities[local] / mass.sum())
+        batch = [np.concatenate(column) for column in zip(*parts)]
+        if self.prioritized:
+            weights = (len(self) * np.concatenate(probs)) ** -beta
+            weights /= weights.max()
+        else:
+            weights = np.ones(batch_size)
+        return batch + [weights.astype(np.float32), np.concatenate(indices)]
+
+    def update_priorities(self, indices, td_errors):
+        shards = np.searchsorted(self.offsets, indices, side='right') - 1
+        td_errors = np.asarray(td_errors).ravel()
+        for shard in np.unique(shards):
+            mine = shards == shard
+            self.buffers[shard].update_priorities(indices[mine] - self.offsets[shard], td_errors[mine])
+
+
+class ActorLearner:
+    def __init__(self, learner, n_actors=2, envs_per_actor=16, env_kwargs=None, make_policy=None,
+                 epsilon=0.05, buffer_size=20000, prioritized=False, alpha=0.6, beta=0.4, batch_size=48,
+                 start_transitions=2000, broadcast_interval=100, replay_ratio=None, queue_size=64,
+                 metrics=None, seed=0):
+        # Asynchronous DQN-style training. n_actors threads each step a VectorHideAndSeekEnv of
+        # envs_per_actor games with their own copy of the policy and put the transitions on a
+        # bounded queue; the learner (run() in the calling thread) moves them into the replay
+        # buffers and trains on sampled batches meanwhile. Every broadcast_interval updates the
+        # learner's weights are published and the actors switch to them before their next step.
+        #
+        # learner must provide
+        #     train(obs, actions, next_obs, rewards, dones, weights) -> TD errors of the batch
+        #     get_weights() -> dict of arrays (a copy the actors can keep)
+        # and make_policy(weights) returns a function obs batch -> greedy actions (default: a
+        # QNetwork with those weights). epsilon (and beta of the prioritized buffers) is a number
+        # or a function of the number of env steps (learner updates).
+        #
+        # NumPy, TensorFlow and the envs release the GIL for their heavy parts, so the actors and
+        # the learner share the cores. replay_ratio caps the sampled transitions per collected
+        # transition (the notebook's batch_size / steps_train); the learner then waits for actors.
+        self.learner = learner
+        self.n_actors = n_actors
+        self.envs_per_actor = envs_per_actor
+        self.env_kwargs = env_kwargs or {}
+        self.make_policy = make_policy or (lambda weights: QNetwork(weights).act)
+        self.epsilon = epsilon
+        self.beta = beta
+        self.batch_size = batch_size
+        self.start_transitions = start_transitions
+        self.broadcast_interval = broadcast_interval
+        self.replay_ratio = replay_ratio
+        self.metrics = metrics
+        self.rng = np.random.default_rng(seed)
+        self._seeds = np.random.SeedSequence(seed).spawn(n_actors)
+
+        probe = VectorHideAndSeekEnv(1, **self.env_kwargs)
+        self.n_actions = probe.single_action_space.n
+        obs_space = probe.single_observation_space
+        obs_shape, obs_dtype = (obs_space.shape, obs_space.dtype) if obs_space.shape else ((), np.int64)
+        rows = max(buffer_size // (n_actors * envs_per_actor), 2)
+        if prioritized:
+            buffers = [PrioritizedReplayBuffer(rows, obs_shape, obs_dtype, envs_per_actor, alpha=alpha)
+                       for _ in range(n_actors)]
+        else:
+            buffers = [ReplayBuffer(rows, obs_shape, obs_dtype, envs_per_actor) for _ in range(n_actors)]
+        self.replay = ReplayShards(buffers)
+
+        # Published weights: (weights, number of learner updates when they were taken)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._published = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._error = None
+
+        # Counters and recent values for stats(); the window deques are appended by the learner
+        self.env_steps = 0
+        self.samples = 0
+        self.updates = 0
+        self.episodes = 0
+        self.broadcasts = 0
+        self.losses = deque(maxlen=1000)
+        self.episode_rewards = deque(maxlen=100)
+        self.queue_depths = deque(maxlen=10000)
+        self.staleness = deque(maxlen=10000)
+        self._start_time = None
+
+    def start(self):
+        if self._threads:
+            return
+        self._publish()
+        self._start_time = time.perf_counter()
+        for actor in range(self.n_actors):
+            thread = threading.Thread(target=self._act, args=(actor,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _publish(self):
+        self._published = (self.learner.get_weights(), self.updates)
+        self.broadcasts += 1
+
+    def _act(self, actor):
+        try:
+            rng = np.random.default_rng(self._seeds[actor])
+            env = VectorHideAndSeekEnv(self.envs_per_actor, seed=int(rng.integers(2 ** 32)), **self.env_kwargs)
+            n = env.num_envs
+            obs = env.reset()
+            version, policy = None, None
+            episode_reward = np.zeros(n, dtype=np.float64)
+            episode_actions = np.zeros((n, self.n_actions), dtype=np.int32)
+            while not self._stop.is_set():
+                weights, published = self._published
+                if published != version:
+                    version, policy = published, self.make_policy(weights)
+                epsilon = self.epsilon(self.env_steps) if callable(self.epsilon) else self.epsilon
+                actions = policy(obs)
+                explore = rng.random(n) < epsilon
+                actions = np.where(explore, rng.integers(self.n_actions, size=n), actions)
+
+                next_obs, rewards, dones, info = env.step(actions)
+                self.env_steps += n  # approximate under concurrent updates, only read for epsilon
+                episode_reward += rewards
+                episode_actions[np.arange(n), actions] += 1
+                finished = None
+                if dones.any():
+                    # Steps are the actions taken, including the final catch (see QLearningTrainer.train)
+                    action_counts = episode_actions[dones]
+                    finished = (action_counts.sum(axis=1), episode_reward[dones], action_counts)
+                    episode_reward[dones] = 0
+                    episode_actions[dones] = 0
+                item = (actor, obs, actions, rewards, dones, version, finished)
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                obs = next_obs
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+
+    def _drain(self, block, deadline=None):
+        # Move queued transitions into the replay buffers; with block=True wait for at least one
+        # (until the deadline). Only the batches queued on entry are taken: the actors refill the
+        # queue about as fast as the learner empties it, so draining until it is empty could keep
+        # the learner here for good.
+        pending = self._queue.qsize()
+        self.queue_depths.append(pending)
+        remaining = max(pending, 1 if block else 0)
+        while remaining > 0:
+            try:
+                item = self._queue.get(timeout=0.1) if block else self._queue.get_nowait()
+            except queue.Empty:
+                if block and not self._stop.is_set() and (deadline is None or time.perf_counter() < deadline):
+                    continue
+                return
+            block = False
+            remaining -= 1
+            actor, obs, actions, rewards, dones, version, finished = item
+            self.replay.add(actor, obs, actions, rewards, dones)
+            self.samples += len(actions)
+            self.staleness.append(self.updates - version)
+            if finished is not None:
+                steps, rewards, action_counts = finished
+                self.episode_rewards.extend(rewards.tolist())
+                if self.metrics is not None:
+                    loss = np.mean(self.losses) if self.losses else np.nan
+                    self.metrics.log_many(self.episodes + np.arange(len(steps)), steps, rewards, loss, action_counts)
+                self.episodes += len(steps)
+
+    def run(self, n_updates=None, seconds=None):
+        # Train until n_updates more learner updates (or seconds) have passed; returns stats()
+        self.start()
+        target = None if n_updates is None else self.updates + n_updates
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        while (target is None or self.updates < target) and (deadline is None or time.perf_counter() < deadline):
+            if self._error is not None:
+                raise self._error
+            if self._stop.is_set():
+                break
+            ready = len(self.replay) >= max(self.start_transitions, 1)
+            ahead = (self.replay_ratio is not None and ready
+                     and (self.updates + 1) * self.batch_size > self.replay_ratio * self.samples)
+            self._drain(not ready or ahead, deadline)
+            if not ready or ahead:
+                continue
+
+            beta = self.beta(self.updates) if callable(self.beta) else self.beta
+            obs, actions, next_obs, rewards, dones, weights, indices = self.replay.sample(self.batch_size, beta, self.rng)
+            td = np.asarray(self.learner.train(obs, actions, next_obs, rewards, dones, weights)).ravel()
+            if self.replay.prioritized:
+                self.replay.update_priorities(indices, td)
+            self.losses.append(float(np.mean(weights * td ** 2)))
+            self.updates += 1
+            if self.updates % self.broadcast_interval == 0:
+                self._publish()
+        return self.stats()
+
+    def stats(self):
+        # Throughput, queue depth (transition batches waiting for the learner) and staleness (how
+        # many learner updates old the weights were that chose the actions of a transition)
+        elapsed = time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+        depths, staleness = np.array(self.queue_depths), np.array(self.staleness)
+        return {
+            "samples": self.samples,
+            "updates": self.updates,
+            "episodes": self.episodes,
+            "broadcasts": self.broadcasts,
+            "samples_per_sec": self.samples / elapsed if elapsed else 0.0,
+            "updates_per_sec": self.updates / elapsed if elapsed else 0.0,
+            "queue_depth": self._queue.qsize(),
+            "queue_depth_mean": float(depths.mean()) if len(depths) else 0.0,
+            "queue_depth_max": int(depths.max()) if len(depths) else 0,
+            "staleness_mean": float(staleness.mean()) if len(staleness) else 0.0,
+            "staleness_max": int(staleness.max()) if len(staleness) else 0,
+            "loss": float(np.mean(self.losses)) if self.losses else float("nan"),
+            "episode_reward": float(np.mean(self.episode_rewards)) if self.episode_rewards else float("nan"),
+        }
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class QTableLearner:
+    # Tabular Q-learning as an ActorLearner learner (1-thief game, 'discrete' observations)
+    def __init__(self, q, alpha=0.4, gamma=0.999):
+        self.q = q
+        self.alpha = alpha
+        self.gamma = gamma
+
+    def train(self, obs, actions, next_obs, rewards, dones, weights):
+        return self.q.update(obs, actions, rewards, next_obs, dones, self.alpha * weights, self.gamma)
+
+    def get_weights(self):
+        return {"values": self.q.values.copy()}
+
+
+# Tabular Q-learning on the 1-thief game through the actor-learner pipeline
+if __name__ == "__main__":
+    import sys
+    from hide_and_seek_map import DEFAULT_MAP, compile_map
+    from hide_and_seek_rules import n_states
+    from q_table import QTable
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    q = QTable(n_states(compile_map(DEFAULT_MAP)), 5)
+    # Updates of a (state, action) drawn several times in a batch add up, so alpha is smaller than
+    # in q_table.py, where every update comes from a different game
+    learner = QTableLearner(q, alpha=0.1)
+    with ActorLearner(learner, n_actors=2, envs_per_actor=64, env_kwargs={"n_thieves": 1},
+                      make_policy=lambda weights: QTable(None, None, values=weights["values"]).greedy,
+                      epsilon=0.017, buffer_size=200000, batch_size=64, start_transitions=1000,
+                      broadcast_interval=50, replay_ratio=1.0) as pipeline:
+        for _ in range(int(seconds // 5)):
+            stats = pipeline.run(seconds=5)
+            print(", ".join("{0} {1:.4g}".format(k, v) for k, v in stats.items()))
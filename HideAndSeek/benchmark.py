@@ -0,0 +1,255 @@
+import gc
+import json
+import multiprocessing as mp
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from hide_and_seek import HideAndSeekEnv
+from hide_and_seek_map import DEFAULT_MAP, compile_map, generate_maze
+from hide_and_seek_rules import n_states
+from prioritized_replay import PrioritizedReplayBuffer
+from q_table import QTable
+from replay_buffer import ReplayBuffer
+from vector_hide_and_seek import VectorHideAndSeekEnv
+import hide_and_seek_1thief
+import hide_and_seek_3thief
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def tiled_map(nx, ny, map_rows=DEFAULT_MAP):
+    # nx * ny copies of a map joined along their borders; the shared borders are opened so that
+    # every part of the larger map can be reached
+    rows = []
+    for j in range(ny):
+        for y, row in enumerate(map_rows):
+            if j > 0 and y == 0:
+                continue
+            line = row + "".join(row[1:] for _ in range(nx - 1))
+            if 0 < y < len(map_rows) - 1:
+                line = "".join(" " if 0 < x < len(line) - 1 and x % (len(row) - 1) == 0 else c for x, c in enumerate(line))
+            rows.append(line)
+        if j < ny - 1:
+            border = list(rows[-1])
+            for x in range(1, len(border) - 1, 2):
+                border[x] = " "
+            rows[-1] = "".join(border)
+    return rows
+
+
+def measure(op, n, items=1, repeat=3, n_traced=500):
+    # Time n calls of op(i) (best of `repeat` runs), then run n_traced of them again under
+    # tracemalloc, which is much slower. items is the number of env steps / samples done by one
+    # call (num_envs for a batched env).
+    op(0)
+    gc.collect()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(n):
+            op(i)
+        best = min(best, time.perf_counter() - start)
+
+    n_traced = min(n, n_traced)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n_traced):
+        op(i)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "us_per_item": best / (n * items) * 1e6,
+        "items_per_sec": n * items / best,
+        "us_per_call": best / n * 1e6,
+        # Memory held at the end of the run (leaks, growing caches) and the most memory in use at
+        # once above the starting point (temporaries of a single call)
+        "retained_bytes_per_call": (current - before) / n_traced,
+        "peak_alloc_kib": (peak - before) / 1024,
+    }
+
+
+def bench_scalar(make_env, n=10000):
+    env = make_env()
+    env.reset(seed=0)
+    actions = np.random.default_rng(0).integers(5, size=n).tolist()
+
+    def step(i):
+        if env.step(actions[i])[2]:
+            env.reset()
+
+    def render(i):
+        env.render('dqn')
+
+    return {"step": measure(step, n), "reset": measure(lambda i: env.reset(), n // 4),
+            "render_dqn": measure(render, n // 4)}
+
+
+def bench_vector(num_envs, n_thieves=3, map_rows=DEFAULT_MAP, obs_type=None, n_steps=None, view=None):
+    env = VectorHideAndSeekEnv(num_envs, n_thieves=n_thieves, map=map_rows, obs_type=obs_type, seed=0, view=view)
+    n_steps = n_steps or max(20, 50000 // num_envs)
+    actions = np.random.default_rng(0).integers(5, size=(n_steps, num_envs))
+    return {"step": measure(lambda i: env.step(actions[i]), n_steps, items=num_envs)}
+
+
+def bench_replay(prioritized, capacity=20000, batch_size=48, n=1000):
+    # DQN notebook settings: 20000 (11, 19, 1) observations, batches of 48
+    shape = (11, 19, 1)
+    if prioritized:
+        buffer = PrioritizedReplayBuffer(capacity, shape)
+    else:
+        buffer = ReplayBuffer(capacity, shape)
+    rng = np.random.default_rng(0)
+    obs = rng.integers(256, size=shape, dtype=np.uint8)
+    for i in range(capacity):
+        buffer.add(obs, i % 5, -1.0, False)
+    results = {"add": measure(lambda i: buffer.add(obs, i % 5, -1.0, False), n)}
+    if prioritized:
+        def sample(i):
+            batch = buffer.sample(batch_size, rng=rng)
+            buffer.update_priorities(batch[-1], rng.standard_normal(batch_size))
+        results["sample_update"] = measure(sample, n, items=batch_size)
+    else:
+        results["sample"] = measure(lambda i: buffer.sample(batch_size, rng=rng), n, items=batch_size)
+    return results
+
+
+def bench_q_update(batch_size, n=2000):
+    # Q-learning update on the 1-thief table; batch_size 1 is the q_learning notebook's per-step update
+    states = n_states(compile_map(DEFAULT_MAP))
+    q = QTable(states, 5)
+    rng = np.random.default_rng(0)
+    batches = [(rng.integers(states, size=batch_size), rng.integers(5, size=batch_size),
+                rng.integers(-10, 101, size=batch_size), rng.integers(states, size=batch_size),
+                rng.random(batch_size) < 0.01) for _ in range(16)]
+
+    def update(i):
+        q.update(*batches[i % 16], alpha=0.4, gamma=0.999)
+
+    return {"update": measure(update, n, items=batch_size)}
+
+
+CASES = {
+    "scalar/1thief": lambda: bench_scalar(hide_and_seek_1thief.HideAndSeekEnv),
+    "scalar/3thief": lambda: bench_scalar(hide_and_seek_3thief.HideAndSeekEnv),
+    "scalar/3thief_planes": lambda: bench_scalar(lambda: HideAndSeekEnv(obs_mode='planes')),
+}
+for _k in (1, 3, 10, 30):
+    CASES["scalar/thieves_{0}".format(_k)] = lambda k=_k: bench_scalar(lambda: HideAndSeekEnv(n_thieves=k))
+for _t in (2, 4):
+    CASES["scalar/map_{0}x{0}".format(_t)] = lambda t=_t: bench_scalar(lambda: HideAndSeekEnv(map=tiled_map(t, t)))
+# Generated mazes with 11 x 19 egocentric observations: step cost and memory should not grow with the map
+for _t in (9, 100, 1000):
+    CASES["scalar/maze_{0}_view".format(_t)] = lambda t=_t: bench_scalar(
+        lambda: HideAndSeekEnv(map=generate_maze(t, t, seed=0, loops=0.05), view=(11, 19)))
+for _n in (1, 64, 4096):
+    CASES["vector/1thief_envs_{0}".format(_n)] = lambda n=_n: bench_vector(n, n_thieves=1)
+    CASES["vector/3thief_envs_{0}".format(_n)] = lambda n=_n: bench_vector(n, n_thieves=3)
+CASES["vector/1thief_discrete_envs_4096"] = lambda: bench_vector(4096, n_thieves=1, obs_type='discrete')
+for _k in (10, 30):
+    CASES["vector/thieves_{0}_envs_1024".format(_k)] = lambda k=_k: bench_vector(1024, n_thieves=k)
+for _t in (2, 4):
+    CASES["vector/map_{0}x{0}_envs_1024".format(_t)] = lambda t=_t: bench_vector(1024, map_rows=tiled_map(t, t))
+for _t in (9, 100, 1000):
+    CASES["vector/maze_{0}_view_envs_1024".format(_t)] = lambda t=_t: bench_vector(
+        1024, map_rows=generate_maze(t, t, seed=0, loops=0.05), view=(11, 19))
+CASES["replay/uniform"] = lambda: bench_replay(False)
+CASES["replay/prioritized"] = lambda: bench_replay(True)
+for _b in (1, 48, 4096):
+    CASES["q_update/batch_{0}".format(_b)] = lambda b=_b: bench_q_update(b)
+
+
+# Upper bounds on the scalar env step in microseconds, checked only by --check: the unit tests
+# leave timing alone, as it varies with the machine and under coverage or a debugger. The scalar
+# envs play one game in plain Python; running that path through NumPy again makes the step
+# several times slower than these bounds.
+STEP_BUDGETS_US = {"scalar/1thief": 12.0, "scalar/3thief": 20.0, "scalar/thieves_1": 12.0, "scalar/thieves_3": 20.0}
+
+
+def over_budget(results):
+    # (case, measured, budget) of every checked case whose step is slower than its budget
+    return [(name, results[name]["step"]["us_per_item"], budget) for name, budget in STEP_BUDGETS_US.items()
+            if name in results and results[name]["step"]["us_per_item"] > budget]
+
+
+def _run_case(name, conn):
+    result = CASES[name]()
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        result["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+    conn.send(result)
+    conn.close()
+
+
+def run(names=None):
+    # Every case runs in a fresh process so that its peak RSS is not hidden by earlier cases
+    results = {}
+    for name in names or CASES:
+        parent, child = mp.Pipe()
+        proc = mp.Process(target=_run_case, args=(name, child))
+        proc.start()
+        child.close()
+        results[name] = parent.recv()
+        proc.join()
+        print(summary_line(name, results[name]))
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "processor": platform.processor(), "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def summary_line(name, result):
+    parts = ["{0}: {1:.2f} us, {2:,.0f}/s".format(op, r["us_per_item"], r["items_per_sec"])
+             for op, r in result.items() if isinstance(r, dict)]
+    return "{0:34s} {1}".format(name, " | ".join(parts))
+
+
+def compare(old, new):
+    # Ratio of the per-item time of every operation measured in both runs (> 1: slower now)
+    for name, result in new["results"].items():
+        for op, r in result.items():
+            if not isinstance(r, dict) or op not in old["results"].get(name, {}):
+                continue
+            ratio = r["us_per_item"] / old["results"][name][op]["us_per_item"]
+            print("{0:34s} {1:12s} {2:6.2f}x{3}".format(name, op, ratio, "  <-- slower" if ratio > 1.1 else ""))
+
+
+# python benchmark.py [-o results.json] [--compare old.json] [--check] [case prefix ...]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HideAndSeek env, replay and Q-update throughput")
+    parser.add_argument("cases", nargs="*", help="run only the cases starting with these prefixes")
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a step exceeds STEP_BUDGETS_US")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.cases or any(name.startswith(p) for p in args.cases)]
+    if args.check:
+        names += [name for name in STEP_BUDGETS_US if name not in names]
+    report = {"meta": metadata(), "results": run(names)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    if args.check:
+        failed = over_budget(report["results"])
+        for name, measured, budget in failed:
+            print("{0}: step {1:.2f} us exceeds the budget of {2:.2f} us".format(name, measured, budget))
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,124 @@
+import json
+import os
+import numpy as np
+
+
+# A checkpoint is two files: path.json, the manifest (name -> dtype, shape and byte offset of
+# every array, plus free-form metadata), and path.data, the arrays back to back in C order, each
+# starting at a multiple of ALIGNMENT bytes. Loading memory-maps path.data, so processes loading
+# the same checkpoint share one copy of it in the page cache and only the pages that are used are
+# read from disk.
+FORMAT = "hideandseek-checkpoint"
+VERSION = 1
+ALIGNMENT = 64
+
+
+def save_checkpoint(path, arrays, metadata=None):
+    # arrays: dict name -> array. Both files are written under temporary names first and then
+    # renamed, so a reader never maps a half-written file.
+    entries = {}
+    offset = 0
+    data_tmp = path + ".data.tmp"
+    with open(data_tmp, "wb") as f:
+        for name, array in arrays.items():
+            array = np.asarray(array, order="C")
+            entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            array.tofile(f)
+            offset += array.nbytes
+            pad = -offset % ALIGNMENT
+            f.write(b"\0" * pad)
+            offset += pad
+    manifest = {"format": FORMAT, "version": VERSION, "data": os.path.basename(path) + ".data", "size": offset,
+                "arrays": entries, "metadata": metadata or {}}
+    with open(path + ".json.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(data_tmp, path + ".data")
+    os.replace(path + ".json.tmp", path + ".json")
+
+
+def read_manifest(path):
+    with open(path + ".json") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+        raise ValueError("{0}.json is not a version {1} checkpoint".format(path, VERSION))
+    return manifest
+
+
+def is_checkpoint(path):
+    return os.path.exists(path + ".json")
+
+
+def load_checkpoint(path, names=None, scope=None, mmap_mode='r'):
+    # Arrays of a checkpoint as a dict. Only the arrays listed in names, or those under scope (whose
+    # "scope/" prefix is dropped, like q_inference.read_checkpoint), are loaded. mmap_mode 'r'
+    # returns read-only views of the mapped file, 'c' copy-on-write views, 'r+' views that write
+    # through to the file; None reads the arrays into memory.
+    manifest = read_manifest(path)
+    data_path = os.path.join(os.path.dirname(path), manifest["data"])
+    if os.path.getsize(data_path) != manifest["size"]:
+        raise ValueError("{0} does not match its manifest (partly written?)".format(data_path))
+
+    selected = {}
+    for name, entry in manifest["arrays"].items():
+        if names is not None and name not in names:
+            continue
+        if scope is not None:
+            if not name.startswith(scope + "/"):
+                continue
+            name = name[len(scope) + 1:]
+        selected[name] = entry
+    if names is not None:
+        missing = set(names) - set(manifest["arrays"])
+        if missing:
+            raise KeyError("not in {0}: {1}".format(path, ", ".join(sorted(missing))))
+
+    arrays = {}
+    if mmap_mode is None:
+        with open(data_path, "rb") as f:
+            for name, entry in selected.items():
+                array = np.empty(entry["shape"], dtype=np.dtype(entry["dtype"]))
+                f.seek(entry["offset"])
+                f.readinto(memoryview(array.reshape(-1).view(np.uint8)))
+                arrays[name] = array
+        return arrays
+
+    raw = np.memmap(data_path, dtype=np.uint8, mode=mmap_mode) if manifest["size"] else np.zeros(0, dtype=np.uint8)
+    for name, entry in selected.items():
+        dtype = np.dtype(entry["dtype"])
+        nbytes = int(np.prod(entry["shape"], dtype=np.int64)) * dtype.itemsize
+        arrays[name] = raw[entry["offset"]:entry["offset"] + nbytes].view(dtype).reshape(entry["shape"])
+    return arrays
+
+
+def convert_tf_checkpoint(prefix, path, scope=None):
+    # Convert a tf.train.Saver checkpoint (prefix.index + prefix.data-00000-of-00001) without
+    # TensorFlow; with a scope only its variables are kept, without the "scope/" prefix
+    from q_inference import read_checkpoint
+    arrays = read_checkpoint(prefix, scope)
+    save_checkpoint(path, arrays, {"source": os.path.basename(prefix), "scope": scope})
+    return arrays
+
+
+# Convert the notebook's TF checkpoint and compare loading times
+if __name__ == "__main__":
+    import sys
+    import time
+    from q_inference import QNetwork, read_checkpoint
+
+    prefix = sys.argv[1] if len(sys.argv) > 1 else "model-1306635"
+    path = sys.argv[2] if len(sys.argv) > 2 else prefix + "-np"
+    arrays = convert_tf_checkpoint(prefix, path)
+    print("{0} -> {1}.json + {1}.data ({2} arrays, {3} bytes)".format(prefix, path, len(arrays), read_manifest(path)["size"]))
+
+    start = time.perf_counter()
+    tf_arrays = read_checkpoint(prefix, "mainQ")
+    tf_time = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = load_checkpoint(path, scope="mainQ")
+    np_time = time.perf_counter() - start
+    assert all(np.array_equal(tf_arrays[name], loaded[name]) for name in tf_arrays)
+    print("mainQ weights: TF checkpoint {0:.2f} ms, mapped {1:.2f} ms".format(1000 * tf_time, 1000 * np_time))
+
+    start = time.perf_counter()
+    network = QNetwork.from_checkpoint(path)
+    print("QNetwork.from_checkpoint({0}): {1:.2f} ms".format(path, 1000 * (time.perf_counter() - start)))
@@ -0,0 +1,271 @@
+import functools
+import glob
+import multiprocessing as mp
+import os
+from collections import deque
+import numpy as np
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+# Columns of the episode log, one row per evaluated episode
+EPISODE_COLUMNS = [("episode", np.int64), ("reward", np.float32), ("steps", np.int32),
+                   ("caught", np.int16), ("truncated", np.bool_)]
+
+
+class EpisodeLog:
+    def __init__(self, directory, chunk_size=65536):
+        # Columnar episode log: rows are buffered in fixed-size column arrays and every full chunk
+        # is written to directory/episodes_NNNNN.npz, so memory stays bounded however many episodes
+        # are logged
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+        self._columns = {name: np.zeros(chunk_size, dtype=dtype) for name, dtype in EPISODE_COLUMNS}
+        self._n = 0
+        self._chunk = len(glob.glob(os.path.join(directory, "episodes_*.npz")))
+
+    def append(self, **columns):
+        # Arrays of equal length, one per column of EPISODE_COLUMNS
+        n = len(columns["episode"])
+        start = 0
+        while start < n:
+            k = min(n - start, self.chunk_size - self._n)
+            for name, _ in EPISODE_COLUMNS:
+                self._columns[name][self._n:self._n + k] = columns[name][start:start + k]
+            self._n += k
+            start += k
+            if self._n == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        if self._n == 0:
+            return
+        path = os.path.join(self.directory, "episodes_{0:05d}.npz".format(self._chunk))
+        np.savez(path, **{name: column[:self._n] for name, column in self._columns.items()})
+        self._chunk += 1
+        self._n = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_episode_log(directory):
+    # Chunks of an EpisodeLog in order, each a dict of column arrays
+    for path in sorted(glob.glob(os.path.join(directory, "episodes_*.npz"))):
+        with np.load(path) as data:
+            yield {name: data[name] for name in data.files}
+
+
+class EvaluationStats:
+    def __init__(self, n_thieves, max_steps=1000, window=1000):
+        # Running statistics over any number of episodes in constant memory: counts, means and
+        # variances (merged batch by batch), fixed-bin histograms for the quantiles and the catch
+        # rate of the last `window` episodes
+        self.n_thieves = n_thieves
+        self.window = window
+        self.episodes = 0
+        self.catches = 0
+        self.truncations = 0
+        self._moments = {"reward": [0, 0.0, 0.0], "steps_to_catch": [0, 0.0, 0.0]}
+        self.reward_edges = np.arange(-10 * max_steps - 10, 100 * n_thieves + 11, 10, dtype=np.float64)
+        self.reward_hist = np.zeros(len(self.reward_edges) - 1, dtype=np.int64)
+        self.steps_hist = np.zeros(max_steps + 1, dtype=np.int64)
+        self._recent = deque(maxlen=window)
+
+    def update(self, reward, steps, caught, truncated, episode=None):
+        # One batch of finished episodes; steps is the number of actions taken, including the final
+        # catch. With their episode numbers the batch enters the rolling window in episode order
+        # rather than in the order the episodes finished (which puts the long ones last).
+        if episode is not None:
+            order = np.argsort(episode, kind='stable')
+            reward, steps, caught, truncated = (np.asarray(x)[order] for x in (reward, steps, caught, truncated))
+        success = (caught == self.n_thieves) & ~truncated
+        self.episodes += len(reward)
+        self.catches += int(success.sum())
+        self.truncations += int(np.sum(truncated))
+        self._merge("reward", np.asarray(reward, dtype=np.float64))
+        self._merge("steps_to_catch", np.asarray(steps, dtype=np.float64)[success])
+        self.reward_hist += np.histogram(np.clip(reward, self.reward_edges[0], self.reward_edges[-1] - 1), self.reward_edges)[0]
+        self.steps_hist += np.bincount(np.minimum(steps[success], len(self.steps_hist) - 1), minlength=len(self.steps_hist))
+        self._recent.extend(success[-self.window:].tolist())
+
+    def _merge(self, name, x):
+        # Chan et al. parallel update of (count, mean, sum of squared deviations)
+        if len(x) == 0:
+            return
+        m = self._moments[name]
+        n, mean, m2 = m
+        n_b, mean_b = len(x), x.mean()
+        delta = mean_b - mean
+        total = n + n_b
+        m[0] = total
+        m[1] = mean + delta * n_b / total
+        m[2] = m2 + ((x - mean_b) ** 2).sum() + delta ** 2 * n * n_b / total
+
+    def _quantiles(self, hist, values, qs):
+        cum = np.cumsum(hist)
+        if cum[-1] == 0:
+            return [float("nan")] * len(qs)
+        return [float(values[np.searchsorted(cum, q * cum[-1])]) for q in qs]
+
+    def summary(self):
+        qs = (0.05, 0.5, 0.95)
+        result = {"episodes": self.episodes,
+                  "catch_rate": self.catches / max(self.episodes, 1),
+                  "rolling_catch_rate": float(np.mean(self._recent)) if self._recent else float("nan"),
+                  "truncated": self.truncations}
+        for name, (n, mean, m2) in self._moments.items():
+            result[name + "_mean"] = mean if n else float("nan")
+            result[name + "_std"] = float(np.sqrt(m2 / n)) if n else float("nan")
+        centers = (self.reward_edges[:-1] + self.reward_edges[1:]) / 2
+        for q, v in zip(qs, self._quantiles(self.reward_hist, centers, qs)):
+            result["reward_q{0:g}".format(100 * q)] = v
+        for q, v in zip(qs, self._quantiles(self.steps_hist, np.arange(len(self.steps_hist)), qs)):
+            result["steps_to_catch_q{0:g}".format(100 * q)] = v
+        return result
+
+
+def evaluate_batched(policy, n_episodes, num_envs=1024, n_thieves=3, obs_type=None, max_steps=1000,
+                     log_dir=None, seed=0, env_kwargs=None):
+    # Play n_episodes with a batched policy (obs batch -> actions) on a VectorHideAndSeekEnv.
+    # Episodes are numbered in the order they start and exactly the first n_episodes started are
+    # recorded, so long episodes are not cut off in favour of short ones.
+    env = VectorHideAndSeekEnv(num_envs, n_thieves=n_thieves, obs_type=obs_type, seed=seed, max_steps=max_steps,
+                               **(env_kwargs or {}))
+    stats = EvaluationStats(n_thieves, max_steps)
+    log = EpisodeLog(log_dir) if log_dir else None
+
+    obs = env.reset()
+    episode = np.arange(num_envs)
+    next_episode = num_envs
+    total_reward = np.zeros(num_envs, dtype=np.float64)
+    # Actions taken, as counted by _play_episodes (info["episode_steps"] leaves out a final catch)
+    steps = np.zeros(num_envs, dtype=np.int64)
+    while (episode < n_episodes).any():
+        obs, rewards, dones, info = env.step(policy(obs))
+        total_reward += rewards
+        steps += 1
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            keep = episode[finished] < n_episodes
+            columns = {"episode": episode[finished][keep], "reward": total_reward[finished][keep],
+                       "steps": steps[finished][keep], "caught": info["episode_caught"][keep],
+                       "truncated": info["truncated"][keep]}
+            stats.update(columns["reward"], columns["steps"], columns["caught"], columns["truncated"], columns["episode"])
+            if log is not None:
+                log.append(**columns)
+            total_reward[finished] = 0
+            steps[finished] = 0
+            episode[finished] = next_episode + np.arange(len(finished))
+            next_episode += len(finished)
+    if log is not None:
+        log.close()
+    return stats
+
+
+def _play_episodes(make_env, make_agent, max_steps, seeds):
+    # Worker of evaluate_parallel: play one episode per seed with a scalar env; steps counts
+    # every action, including the final catch
+    env = make_env()
+    agent = make_agent(env)
+    n = len(seeds)
+    reward = np.zeros(n, dtype=np.float64)
+    steps = np.zeros(n, dtype=np.int64)
+    caught = np.zeros(n, dtype=np.int64)
+    truncated = np.zeros(n, dtype=bool)
+    for i, seed in enumerate(seeds):
+        obs = env.reset(seed=int(seed))
+        done = False
+        while not done and steps[i] < max_steps:
+            obs, r, done, _ = env.step(agent(obs))
+            reward[i] += r
+            steps[i] += 1
+        caught[i] = sum(d == 4 for d in env.thief_dir)
+        truncated[i] = not done
+    return reward, steps, caught, truncated
+
+
+def evaluate_parallel(make_env, make_agent, n_episodes, n_workers=None, chunk=64, max_steps=1000,
+                      log_dir=None, seed=0):
+    # Play n_episodes of a scalar env (e.g. the HideAndSeekEnv of hide_and_seek_1thief.py or
+    # hide_and_seek_3thief.py) in n_workers processes. make_agent(env) returns a function
+    # obs -> action, such as planner_agent. Results are streamed chunk by chunk as they finish.
+    seeds = np.random.SeedSequence(seed).generate_state(n_episodes)
+    n_thieves = make_env().n_thieves
+    stats = EvaluationStats(n_thieves, max_steps)
+    log = EpisodeLog(log_dir) if log_dir else None
+    starts = range(0, n_episodes, chunk)
+    play = functools.partial(_play_episodes, make_env, make_agent, max_steps)
+    with mp.Pool(n_workers) as pool:
+        results = pool.imap(play, [seeds[s:s + chunk] for s in starts])
+        for start, (reward, steps, caught, truncated) in zip(starts, results):
+            stats.update(reward, steps, caught, truncated)
+            if log is not None:
+                log.append(episode=np.arange(start, start + len(reward)), reward=reward, steps=steps,
+                           caught=caught, truncated=truncated)
+    if log is not None:
+        log.close()
+    return stats
+
+
+# Agents for evaluate_parallel: make_agent(env) -> (obs -> action). Use functools.partial to
+# bind the arguments so that they can be sent to the worker processes.
+
+def planner_agent(env, **planner_kwargs):
+    from planner import ExpectimaxPlanner
+    planner = ExpectimaxPlanner(env, **planner_kwargs)
+    return lambda obs: planner.act(env)
+
+
+def q_table_agent(env, path):
+    from q_table import QTable
+    q = QTable.load(path, mmap_mode='r')
+    return lambda obs: int(q.greedy(obs))
+
+
+def q_network_agent(env, prefix):
+    from q_inference import QNetwork
+    network = QNetwork.from_checkpoint(prefix)
+    return lambda obs: int(network.act(obs[None])[0])
+
+
+# python evaluate.py random|q_table PATH|dqn PREFIX|planner [--episodes N] [--log DIR]
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Evaluate a police agent on the HideAndSeek envs")
+    parser.add_argument("agent", choices=["random", "q_table", "dqn", "planner"])
+    parser.add_argument("path", nargs="?", help="Q-table or network checkpoint path (TensorFlow or checkpoint.py)")
+    parser.add_argument("--episodes", type=int, default=10000)
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--log", help="directory for the episode log")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.agent == "random":
+        rng = np.random.default_rng(0)
+        stats = evaluate_batched(lambda obs: rng.integers(5, size=len(obs)), args.episodes,
+                                 max_steps=args.max_steps, log_dir=args.log)
+    elif args.agent == "q_table":
+        from q_table import QTable
+        q = QTable.load(args.path)
+        stats = evaluate_batched(q.greedy, args.episodes, n_thieves=1, obs_type='discrete',
+                                 max_steps=args.max_steps, log_dir=args.log)
+    elif args.agent == "dqn":
+        from q_inference import QNetwork
+        network = QNetwork.from_checkpoint(args.path)
+        stats = evaluate_batched(network.act, args.episodes, max_steps=args.max_steps, log_dir=args.log)
+    else:
+        from hide_and_seek_3thief import HideAndSeekEnv
+        stats = evaluate_parallel(HideAndSeekEnv, planner_agent, args.episodes, max_steps=args.max_steps,
+                                  log_dir=args.log)
+    print("{0} episodes in {1:.1f}s".format(stats.episodes, time.perf_counter() - start))
+    for name, value in stats.summary().items():
+        print("{0:24s} {1}".format(name, value))
@@ -0,0 +1,226 @@
+from gym import Env, spaces
+import numpy as np
+from typing import Optional
+from hide_and_seek_map import DEFAULT_MAP, compile_map
+from hide_and_seek_render import ObservationRenderer
+from hide_and_seek_rules import CAUGHT, catch_one, move_one, pack_state, thief_sees_police_one, unpack_state
+from profiling import StepProfiler
+from thief_policies import make_thief_policy
+
+
+class HideAndSeekEnv(Env):
+    def __init__(self, n_thieves=3, map=DEFAULT_MAP, obs_mode='dqn', obs_buffers=0, seed=None, profile=False,
+                 thief_policy=None, view=None):
+        super(HideAndSeekEnv, self).__init__()
+
+        # Map and Grid size; the legal-move and sight tables are compiled once per map layout. Any
+        # list of equally long strings in the format of DEFAULT_MAP works, e.g. generate_maze()
+        self.map = list(map)
+        self.grid_size = (len(self.map), len(self.map[0]))
+        self.layout = compile_map(self.map)
+        self.n_thieves = n_thieves
+
+        # Action space: move east, move west, move south, move north, catch
+        self.action_space = spaces.Discrete(5)
+
+        # Observation returned by reset/step: 'dqn' (map characters, uint8) or 'planes' (one-hot planes).
+        # With obs_buffers > 0 observations are written into a ring of that many preallocated arrays
+        # instead of a new array each step, so an observation must be copied if kept longer.
+        # view=(h, w) observes only the h x w window centred on the police (see ObservationRenderer).
+        self.obs_mode = obs_mode
+        self.obs_buffers = obs_buffers
+        self.view = tuple(view) if view is not None else None
+        self._renderers = {}
+        obs_size = self.view or self.grid_size
+        self.observation_space = spaces.Box(low=0, high=255, shape=obs_size + (1 if obs_mode == 'dqn' else 5,), dtype=np.uint8)
+
+        # Thief random walks and spawn positions are drawn from this generator (reset(seed=...) reseeds it)
+        self.np_random = np.random.default_rng(seed)
+
+        # Thief behaviour, called once per step for all thieves: None / 'random' (random walk),
+        # 'evasive', 'hiding' or any callable, see thief_policies.py
+        self.thief_policy = make_thief_policy(thief_policy)
+
+        # With profile=True, step(), reset() and render() record per-phase nanosecond counters (see
+        # stats()); otherwise they only pay for an `is not None` check per phase
+        self.profiler = StepProfiler() if profile else None
+        self._profile_stack = None
+
+        # Initialize state
+        self.reset()
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[dict] = None
+    ):
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+            self._profile_stack = "reset;observe"
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+
+        # Police starts at (1, 1); thieves on random empty spaces facing a random direction
+        # (0: east, 1: west, 2: south, 3: north, 4: caught). The state of one game is kept in
+        # Python ints and lists (thief_pos and thief_dir have one entry per thief), which the
+        # step rules index much faster than small NumPy arrays.
+        spawn_cells = self.layout.spawn_cells
+        self.police = self.layout.cell(1, 1)
+        self.thief_pos = spawn_cells[self.np_random.integers(len(spawn_cells), size=self.n_thieves)].tolist()
+        self.thief_dir = self.np_random.integers(4, size=self.n_thieves).tolist()
+
+        # Time step
+        self.steps = 0
+        if prof is not None:
+            prof.lap("reset;spawn")
+
+        obs = self._observe()
+        if prof is not None:
+            prof.lap("reset;observe")
+            self._profile_stack = None
+        return obs
+
+    def step(self, action):
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+            self._profile_stack = "step;observe"
+        if type(action) is not int:
+            action = int(np.asarray(action).item())
+
+        # Reward and done flag
+        reward = -1  # time penalty
+        done = False
+
+        # Police action
+        if action < 4:
+            if self.layout.legal_list[self.police] >> action & 1:
+                self.police += self.layout.offset_list[action]
+            else:
+                reward = -10
+        elif action == 4:  # catch action
+            caught, reward = catch_one(self.layout, self.police, self.thief_pos, self.thief_dir)
+            self.thief_dir = [CAUGHT if c else d for c, d in zip(caught, self.thief_dir)]
+            done = all(d == CAUGHT for d in self.thief_dir)
+        if prof is not None:
+            prof.lap("step;police" if action < 4 else "step;catch")
+
+        # Thieves action (thief policy); nobody moves once all thieves are caught
+        if not done:
+            policy = self.thief_policy
+            if hasattr(policy, "one"):
+                thief_dir = policy.one(self.layout, self.police, self.thief_pos, self.thief_dir, self.np_random)
+            else:
+                thief_dir = np.asarray(policy(self.layout, self.police, np.array(self.thief_pos), np.array(self.thief_dir),
+                                              self.np_random)).tolist()
+            layout = self.layout
+            self.thief_pos = [cell if old == CAUGHT else move_one(layout, cell, d)
+                              for cell, old, d in zip(self.thief_pos, self.thief_dir, thief_dir)]
+            self.thief_dir = [old if old == CAUGHT else d for old, d in zip(self.thief_dir, thief_dir)]
+
+            self.steps += 1
+            if prof is not None:
+                prof.lap("step;thieves")
+
+        obs = self._observe()
+        if prof is not None:
+            prof.lap("step;observe")
+            self._profile_stack = None
+        return obs, reward, done, {}
+
+    @property
+    def state(self):
+        # [police_x, police_y, thief1_x, thief1_y, thief1_dir, thief2_x, ...]
+        police_x, police_y = self.layout.position(self.police)
+        thief_x, thief_y = self.layout.position(np.array(self.thief_pos))
+        thieves = np.stack([thief_x, thief_y, self.thief_dir], axis=1)
+        return np.concatenate([[police_x, police_y], thieves.ravel()])
+
+    @state.setter
+    def state(self, state):
+        state = np.asarray(state)
+        self.police = self.layout.cell(int(state[0]), int(state[1]))
+        thieves = state[2:].reshape(self.n_thieves, 3)
+        self.thief_pos = self.layout.cell(thieves[:, 0], thieves[:, 1]).tolist()
+        self.thief_dir = thieves[:, 2].tolist()
+
+    def pack_state(self):
+        # Whole game state as one integer (see hide_and_seek_rules.pack_state); equal games give
+        # equal keys, so it can be hashed or stored instead of the arrays
+        return pack_state(self.layout, self.police, self.thief_pos, self.thief_dir)
+
+    def unpack_state(self, key):
+        self.police, self.thief_pos, self.thief_dir = unpack_state(self.layout, key, self.n_thieves)
+
+    def get_state(self):
+        # Snapshot for lookahead / tree search: (packed state, step count, generator state). Restoring
+        # it with set_state() replays the same thief moves; the state of a thief policy is not included.
+        return self.pack_state(), self.steps, self.np_random.bit_generator.state
+
+    def set_state(self, snapshot):
+        key, steps, rng_state = snapshot
+        self.unpack_state(key)
+        self.steps = steps
+        if rng_state is not None:
+            self.np_random.bit_generator.state = rng_state
+
+    def is_thief_hiding(self):
+        # Check if the police is in the line of sight of any thief
+        return any(thief_sees_police_one(self.layout, self.police, cell, d) for cell, d in zip(self.thief_pos, self.thief_dir))
+
+    def render(self, mode='none', out=None):
+        prof = self.profiler
+        if prof is not None:
+            # Phases of a render called by step() are nested under it
+            stack = self._profile_stack or "render"
+            if self._profile_stack is None:
+                prof.start()
+        hiding = self.is_thief_hiding()
+        if prof is not None:
+            prof.lap(stack + ";hiding")
+
+        if mode in ('dqn', 'planes'):
+            if mode not in self._renderers:
+                self._renderers[mode] = ObservationRenderer(self.layout, mode, self.obs_buffers, self.view)
+            thieves = list(zip(self.thief_pos, self.thief_dir))
+            obs = self._renderers[mode].render(self.police, thieves, hiding, out)
+            if prof is not None:
+                prof.lap(stack + ";draw")
+            return obs
+
+        grid = [list(row) for row in self.map]
+        police_x, police_y = self.layout.position(self.police)
+        grid[police_y][police_x] = 'P'
+        for cell, d in zip(self.thief_pos, self.thief_dir):
+            thief_x, thief_y = self.layout.position(cell)
+            if not hiding:
+                grid[thief_y][thief_x] = '{0}'.format(d)
+            elif d != CAUGHT:
+                grid[thief_y][thief_x] = '{0}'.format(d + 5)  # Hidden state
+
+        for row in grid:
+            print(' '.join(row))
+        print()
+
+    def stats(self):
+        # Per-phase calls and nanoseconds since construction or profiler.reset() (profile=True only)
+        return self.profiler.stats() if self.profiler is not None else {}
+
+    def _observe(self):
+        return self.render(self.obs_mode)
+
+
+# Create and use the environment
+if __name__ == "__main__":
+    env = HideAndSeekEnv(n_thieves=5)
+    env.reset()
+    env.render()
+
+    done = False
+    while not done:
+        action = env.action_space.sample()  # Sample random action
+        state, reward, done, *_ = env.step(action)
+        env.render()
+        print("Action: {0}, Reward: {1}, Done: {2}".format(action, reward, done))
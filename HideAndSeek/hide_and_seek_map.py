@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from functools import cached_property
+import numpy as np
+
+
+# Default map shared by hide_and_seek_1thief.py, hide_and_seek_3thief.py and vector_hide_and_seek.py
+DEFAULT_MAP = [
+    "o-----------------o",
+    "| |   |     |     |",
+    "|     |-| | |-|-| |",
+    "| |       | |     |",
+    "|-|           |-| |",
+    "|   | |           |",
+    "| |           |-| |",
+    "| |           |   |",
+    "| |-|-|-|     |-| |",
+    "|               |-|",
+    "o-----------------o",
+]
+
+# Directions / moves: 0: east, 1: west, 2: south, 3: north
+EAST, WEST, SOUTH, NORTH = 0, 1, 2, 3
+
+# Number of legal directions for every 4-bit move mask, and the n-th legal direction of a mask
+POPCOUNT = np.array([bin(m).count("1") for m in range(16)], dtype=np.int64)
+NTH_BIT = np.zeros((16, 4), dtype=np.int64)
+for _m in range(16):
+    _bits = [d for d in range(4) if _m >> d & 1]
+    NTH_BIT[_m, :len(_bits)] = _bits
+# Legal directions of every move mask as tuples, for loops over the moves of one cell
+LEGAL_DIRS = [tuple(d for d in range(4) if m >> d & 1) for m in range(16)]
+
+
+class HideAndSeekMap:
+    def __init__(self, map_rows):
+        self.rows = tuple(map_rows)
+        self.grid_size = (len(self.rows), len(self.rows[0]))
+        height, width = self.grid_size
+        if any(len(row) != width for row in self.rows):
+            raise ValueError("all map rows must have the same length")
+        # Thieves and the police stand on the odd columns of the rows inside the border:
+        # (rows, columns) of these cells, e.g. 9 x 9 for DEFAULT_MAP
+        self.cell_shape = (height - 2, (width - 1) // 2)
+
+        # Cells are indexed by their flat position y * width + x in the character grid, so the
+        # same index addresses the 'dqn' observation plane. A move in direction d adds offsets[d]
+        # to the index (offsets[4] = 0 is the catch action), so no per-cell neighbour table is kept.
+        self.grid = np.frombuffer("".join(self.rows).encode("latin-1"), dtype=np.uint8).reshape(height, width)
+        free = self.grid == ord(" ")
+        self.offsets = np.array([2, -2, width, -width, 0], dtype=np.int64)
+
+        # Legal-move bitmask (bit d set if direction d is open). Same wall checks as
+        # HideAndSeekEnv.step: east/west look at the separator next to the cell, south/north look
+        # at the row below/above.
+        legal = np.zeros((height, width), dtype=np.uint8)
+        legal[:, :-1] |= free[:, 1:] << np.uint8(EAST)
+        legal[:, 1:] |= free[:, :-1] << np.uint8(WEST)
+        legal[:-1] |= free[1:] << np.uint8(SOUTH)
+        legal[1:] |= free[:-1] << np.uint8(NORTH)
+        self.legal_moves = legal.ravel()
+
+        # Line of sight: number of moves a thief facing direction d can see ahead before a wall
+        # blocks the view. Each line is filled from its far end, so a cell reuses the range of
+        # the neighbour it looks at.
+        self.sight = np.zeros((height * width, 4), dtype=np.int16)
+        cells = np.arange(height * width).reshape(height, width)
+        for d, lines in [(EAST, cells.T[::-1]), (WEST, cells.T), (SOUTH, cells[::-1]), (NORTH, cells)]:
+            for line in lines:
+                ahead = ((self.legal_moves[line] >> d) & 1) == 1
+                self.sight[line, d] = np.where(ahead, self.sight[self.move(line, d), d] + 1, 0)
+
+        # Cells where a thief can spawn (empty spaces on odd columns)
+        free[:, ::2] = False
+        self.spawn_cells = np.flatnonzero(free)
+        # Position of each cell in spawn_cells (-1 for the others); the police and the thieves only
+        # ever stand on these cells, so this numbers their positions compactly
+        self.spawn_index = np.full(height * width, -1, dtype=np.int32)
+        self.spawn_index[self.spawn_cells] = np.arange(len(self.spawn_cells))
+
+        self.offset_list = self.offsets.tolist()
+
+    # Python-list views of the tables for the scalar envs and the planner, where indexing a list is
+    # much cheaper than indexing a NumPy array element by element. They are built on first use, so
+    # a large map used only by the vector env does not hold them.
+
+    @cached_property
+    def legal_list(self):
+        return self.legal_moves.tolist()
+
+    @cached_property
+    def sight_list(self):
+        return self.sight.tolist()
+
+    @cached_property
+    def spawn_cell_list(self):
+        return self.spawn_cells.tolist()
+
+    @cached_property
+    def spawn_index_list(self):
+        return self.spawn_index.tolist()
+
+    def cell(self, x, y):
+        return y * self.grid_size[1] + x
+
+    def position(self, cell):
+        # (x, y) of a cell index (or of an array of them)
+        y, x = divmod(cell, self.grid_size[1])
+        return x, y
+
+    def move(self, cells, directions):
+        # Cells reached by moving in the given directions; a blocked move (or 4) stays in place
+        return cells + self.offsets[directions] * ((self.legal_moves[cells] >> directions) & 1)
+
+    def neighbours(self, cells):
+        # Cells reached in each of the 4 directions, shape cells.shape + (4,)
+        cells = np.asarray(cells)[..., None]
+        directions = np.arange(4)
+        return cells + self.offsets[directions] * ((self.legal_moves[cells] >> directions) & 1)
+
+
+# Layouts kept by compile_map, least recently used first. Training on a stream of generated mazes
+# would otherwise keep every layout it ever compiled alive.
+MAX_CACHED_MAPS = 64
+_maps = OrderedDict()
+
+
+def compile_map(map_rows=DEFAULT_MAP, cache=True):
+    # Compile each layout once and share the tables between all env instances that use it; with
+    # cache=False a new layout is compiled and nothing is kept
+    key = tuple(map_rows)
+    if not cache:
+        return HideAndSeekMap(key)
+    layout = _maps.get(key)
+    if layout is None:
+        layout = _maps[key] = HideAndSeekMap(key)
+        if len(_maps) > MAX_CACHED_MAPS:
+            _maps.popitem(last=False)
+    _maps.move_to_end(key)
+    return layout
+
+
+def generate_maze(width, height, seed=None, loops=0.0):
+    # Random maze in the map format above with width x height cells (cell_shape (height, width)).
+    # Cells on even rows (counting from 0) are rooms joined by a spanning tree (depth-first
+    # backtracker), so every room can be reached from every other one; odd rows are walls ('-')
+    # with an opening wherever the tree goes south. A fraction `loops` of the remaining walls
+    # between rooms is opened as well, which adds cycles. The police start cell (1, 1) is a room.
+    rng = np.random.default_rng(seed)
+    n_y, n_x = (height + 1) // 2, width  # rooms
+    east = np.zeros((n_y, n_x), dtype=bool)  # passage to the room east of each room
+    south = np.zeros((n_y, n_x), dtype=bool)  # passage to the room south of each room
+
+    visited = np.zeros(n_y * n_x, dtype=bool)
+    visited[0] = True
+    stack = [0]
+    while stack:
+        room = stack[-1]
+        y, x = divmod(room, n_x)
+        options = []
+        if x + 1 < n_x and not visited[room + 1]:
+            options.append(room + 1)
+        if x > 0 and not visited[room - 1]:
+            options.append(room - 1)
+        if y + 1 < n_y and not visited[room + n_x]:
+            options.append(room + n_x)
+        if y > 0 and not visited[room - n_x]:
+            options.append(room - n_x)
+        if not options:
+            stack.pop()
+            continue
+        nxt = options[rng.integers(len(options))]
+        a, b = min(room, nxt), max(room, nxt)
+        if b - a == 1:
+            east.flat[a] = True
+        else:
+            south.flat[a] = True
+        visited[nxt] = True
+        stack.append(nxt)
+
+    if loops > 0:
+        east[:, :-1] |= rng.random((n_y, n_x - 1)) < loops
+        south[:-1] |= rng.random((n_y - 1, n_x)) < loops
+
+    grid = np.full((height + 2, 2 * width + 1), ord("|"), dtype=np.uint8)
+    grid[[0, -1]] = ord("-")
+    grid[[0, 0, -1, -1], [0, -1, 0, -1]] = ord("o")
+    inner = grid[1:-1]
+    inner[:, 1::2] = ord("-")
+    inner[::2, 1::2] = ord(" ")
+    inner[::2, 2:-1:2][east[:, :-1]] = ord(" ")
+    inner[1::2, 1::2][south[:len(inner[1::2])]] = ord(" ")
+    return [row.tobytes().decode("latin-1") for row in grid]
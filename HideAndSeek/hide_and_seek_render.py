@@ -0,0 +1,125 @@
+import numpy as np
+
+
+# Channels of the 'planes' observation (one-hot, uint8)
+PLANES = ("walls", "police", "visible thieves", "hidden thieves", "caught")
+WALLS, POLICE, VISIBLE, HIDDEN, CAUGHT = range(len(PLANES))
+
+
+def pad_for_view(template, view, fill):
+    # template (H, W, C) surrounded by a border of `fill` (one value per channel) so that the
+    # (h, w) window centred on any cell (y, x) is padded[y:y + h, x:x + w]
+    h, w = view
+    height, width, channels = template.shape
+    padded = np.empty((height + h - 1, width + w - 1, channels), dtype=template.dtype)
+    padded[:] = fill
+    padded[h // 2:h // 2 + height, w // 2:w // 2 + width] = template
+    return padded
+
+
+class ObservationRenderer:
+    def __init__(self, layout, mode='dqn', n_buffers=0, view=None):
+        # mode 'dqn': (H, W, 1) map characters as in render('dqn'), 'planes': (H, W, 5) one-hot planes.
+        # With view=(h, w) only the h x w window centred on the police is rendered (egocentric
+        # crop, the police at (h // 2, w // 2)); outside the map reads as 0 in 'dqn' mode and as a
+        # wall in 'planes' mode. The cost of a step then does not depend on the size of the map.
+        self.layout = layout
+        self.mode = mode
+        self.view = view
+        height, width = layout.grid_size
+        if mode == 'dqn':
+            self.template = layout.grid.reshape(height, width, 1).copy()
+            fill = [0]
+        elif mode == 'planes':
+            self.template = np.zeros((height, width, len(PLANES)), dtype=np.uint8)
+            self.template[..., WALLS] = layout.grid != ord(" ")
+            fill = [1 if plane == WALLS else 0 for plane in range(len(PLANES))]
+        else:
+            raise ValueError("unknown observation mode: {0}".format(mode))
+        if view is not None:
+            self._padded = pad_for_view(self.template, view, fill)
+            self.template = self._padded[:view[0], :view[1]].copy()
+        self.shape = self.template.shape
+        self._template_cells = self.template.reshape(self.shape[0] * self.shape[1], -1)
+        self._map_codes = layout.grid.ravel()
+
+        # Ring of preallocated observations. A returned observation stays valid until n_buffers
+        # more observations have been rendered; only the cells drawn last time are restored.
+        self.n_buffers = n_buffers
+        self._ring = np.repeat(self.template[None], n_buffers, axis=0) if n_buffers else None
+        self._ring_cells = [obs.reshape(self._template_cells.shape) for obs in self._ring] if n_buffers else None
+        self._dirty = [[] for _ in range(n_buffers)]
+        self._slot = 0
+
+    def render(self, police, thieves, hiding, out=None):
+        # police: cell index, thieves: (cell, direction) pairs, hiding: result of is_thief_hiding
+        if self.view is not None:
+            return self._render_view(police, thieves, hiding, out)
+        if out is not None:
+            if out.shape != self.shape or not out.flags.c_contiguous:
+                raise ValueError("out must be a C-contiguous array of shape {0}".format(self.shape))
+            np.copyto(out, self.template, casting='unsafe')
+            cells = out.reshape(self._template_cells.shape)
+            dirty = []
+        elif self._ring is None:
+            out = self.template.copy()
+            cells = out.reshape(self._template_cells.shape)
+            dirty = []
+        else:
+            out = self._ring[self._slot]
+            cells = self._ring_cells[self._slot]
+            dirty = self._dirty[self._slot]
+            self._slot = (self._slot + 1) % self.n_buffers
+            if self.mode == 'dqn':
+                for cell in dirty:
+                    cells[cell, 0] = self._map_codes[cell]
+            else:
+                for cell in dirty:
+                    cells[cell, POLICE:] = 0
+            del dirty[:]
+
+        self._draw(cells, police, thieves, hiding)
+        dirty.append(police)
+        dirty.extend(cell for cell, _ in thieves)
+        return out
+
+    def _render_view(self, police, thieves, hiding, out):
+        if out is not None:
+            if out.shape != self.shape or not out.flags.c_contiguous:
+                raise ValueError("out must be a C-contiguous array of shape {0}".format(self.shape))
+        elif self._ring is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        else:
+            out = self._ring[self._slot]
+            self._slot = (self._slot + 1) % self.n_buffers
+        h, w = self.view
+        x, y = self.layout.position(police)
+        np.copyto(out, self._padded[y:y + h, x:x + w], casting='unsafe')
+
+        # Thieves outside the window are not drawn
+        visible = []
+        for cell, d in thieves:
+            thief_x, thief_y = self.layout.position(cell)
+            row, column = thief_y - y + h // 2, thief_x - x + w // 2
+            if 0 <= row < h and 0 <= column < w:
+                visible.append((row * w + column, d))
+        self._draw(out.reshape(h * w, -1), h // 2 * w + w // 2, visible, hiding)
+        return out
+
+    def _draw(self, cells, police, thieves, hiding):
+        if self.mode == 'dqn':
+            cells[police, 0] = ord("P")
+            for cell, d in thieves:
+                if not hiding:
+                    cells[cell, 0] = ord("0") + d
+                elif d != 4:
+                    cells[cell, 0] = ord("5") + d  # Hidden state
+        else:
+            cells[police, POLICE] = 1
+            for cell, d in thieves:
+                if d == 4:
+                    cells[cell, CAUGHT] = 1
+                elif hiding:
+                    cells[cell, HIDDEN] = 1
+                else:
+                    cells[cell, VISIBLE] = 1
@@ -0,0 +1,156 @@
+import numpy as np
+from hide_and_seek_map import LEGAL_DIRS, NTH_BIT, POPCOUNT
+
+
+# Thief direction of a caught thief (police action 4 is catch)
+CAUGHT = 4
+
+
+# Game rules shared by HideAndSeekEnv, VectorHideAndSeekEnv and the thief policies. police has
+# shape (...) and the thief arrays shape (..., n_thieves), so the same code serves one game or a
+# batch of games.
+
+def thief_sees_police(layout, police, thief_pos, thief_dir):
+    # Per-thief part of is_thief_hiding: the free thief is looking at the police along its row or
+    # column and no wall is in between (the police is within the thief's sight range)
+    police_x, police_y = layout.position(np.asarray(police)[..., None])
+    thief_x, thief_y = layout.position(thief_pos)
+    dx, dy = police_x - thief_x, police_y - thief_y
+    # East/west look along the row (dx, two characters per move), south/north along the column (dy)
+    along = np.where(thief_dir < 2, dx // 2, dy)
+    across = np.where(thief_dir < 2, dy, dx)
+    ahead = np.where(thief_dir % 2 == 0, along, -along)
+    sight = layout.sight[thief_pos, np.minimum(thief_dir, 3)]
+    return (across == 0) & (ahead >= 0) & (ahead <= sight) & (thief_dir != CAUGHT)
+
+
+def in_catch_range(layout, police, thief_pos):
+    # Only a thief in the same column and at most one row away can be caught: the east/west
+    # conditions of the original env compared an int with " " and never held.
+    police_x, police_y = layout.position(np.asarray(police)[..., None])
+    thief_x, thief_y = layout.position(thief_pos)
+    return (thief_x == police_x) & (np.abs(thief_y - police_y) <= 1)
+
+
+def catch(layout, police, thief_pos, thief_dir):
+    # Thieves caught by a catch action and the reward: +100 per caught thief, -10 if none.
+    # Nobody can be caught while any thief is looking at the police.
+    hiding = thief_sees_police(layout, police, thief_pos, thief_dir).any(axis=-1)
+    caught = (thief_dir != CAUGHT) & in_catch_range(layout, police, thief_pos) & ~hiding[..., None]
+    n_caught = caught.sum(axis=-1)
+    return caught, np.where(n_caught > 0, 100 * n_caught, -10)
+
+
+def random_walk(layout, thief_pos, u):
+    # Move every thief one cell in a direction picked uniformly, using u in [0, 1), among the
+    # directions not blocked by a wall; returns the new cells and directions
+    masks = layout.legal_moves[thief_pos]
+    thief_dir = NTH_BIT[masks, (u * POPCOUNT[masks]).astype(np.int64)]
+    return layout.move(thief_pos, thief_dir), thief_dir
+
+
+# The same rules for one game with Python ints and lists (HideAndSeekEnv.step). With one to a few
+# thieves NumPy's per-call overhead costs more than the work, so the scalar env does not use the
+# array versions above; VectorHideAndSeekEnv does.
+
+def thief_sees_police_one(layout, police, cell, d):
+    # thief_sees_police for one thief
+    if d == CAUGHT:
+        return False
+    width = layout.grid_size[1]
+    police_y, police_x = divmod(police, width)
+    thief_y, thief_x = divmod(cell, width)
+    if d < 2:
+        along, across = (police_x - thief_x) // 2, police_y - thief_y
+    else:
+        along, across = police_y - thief_y, police_x - thief_x
+    ahead = along if d % 2 == 0 else -along
+    return across == 0 and 0 <= ahead <= layout.sight_list[cell][d]
+
+
+def catch_one(layout, police, thief_pos, thief_dir):
+    # catch for one game: (list of caught flags, reward)
+    if any(thief_sees_police_one(layout, police, cell, d) for cell, d in zip(thief_pos, thief_dir)):
+        return [False] * len(thief_pos), -10
+    width = layout.grid_size[1]
+    police_y, police_x = divmod(police, width)
+    caught = []
+    for cell, d in zip(thief_pos, thief_dir):
+        thief_y, thief_x = divmod(cell, width)
+        caught.append(d != CAUGHT and thief_x == police_x and -1 <= thief_y - police_y <= 1)
+    n_caught = sum(caught)
+    return caught, 100 * n_caught if n_caught else -10
+
+
+def random_walk_one(layout, cell, u):
+    # random_walk for one thief: same direction for the same u, returns (cell, direction)
+    directions = LEGAL_DIRS[layout.legal_list[cell]]
+    if not directions:
+        return cell, 0
+    d = directions[int(u * len(directions))]
+    return cell + layout.offset_list[d], d
+
+
+def move_one(layout, cell, d):
+    # layout.move for one cell
+    if layout.legal_list[cell] >> d & 1:
+        return cell + layout.offset_list[d]
+    return cell
+
+
+def n_states(layout):
+    # Number of encoded 1-thief states (see encode_state): police cell, thief cell and thief
+    # direction; 26244 for DEFAULT_MAP
+    rows, columns = layout.cell_shape
+    return (rows * columns) ** 2 * 4
+
+
+def encode_state(layout, police, thief, thief_dir):
+    # 1-thief state index in range(n_states(layout)) of the police cell, thief cell and thief
+    # direction (ints or arrays): police x, police y, thief x, thief y, direction, most significant first
+    rows, columns = layout.cell_shape
+    police_x, police_y = layout.position(police)
+    thief_x, thief_y = layout.position(thief)
+    i = (police_x - 1) // 2
+    i = i * rows + police_y - 1
+    i = i * columns + (thief_x - 1) // 2
+    i = i * rows + thief_y - 1
+    return i * 4 + thief_dir
+
+
+def decode_state(layout, i):
+    # Inverse of encode_state: police cell, thief cell and thief direction
+    width = layout.grid_size[1]
+    rows, columns = layout.cell_shape
+    thief_dir = i % 4
+    i = i // 4
+    thief_y = i % rows + 1
+    i = i // rows
+    thief_x = i % columns * 2 + 1
+    i = i // columns
+    police_y = i % rows + 1
+    police_x = i // rows * 2 + 1
+    return police_y * width + police_x, thief_y * width + thief_x, thief_dir
+
+
+def pack_state(layout, police, thief_pos, thief_dir):
+    # One game as an integer: the police cell, then cell * 5 + direction of every thief (cells
+    # numbered by layout.spawn_index, direction 4 is caught). thief_pos / thief_dir are sequences.
+    n_cells = len(layout.spawn_cells)
+    index = layout.spawn_index_list
+    key = index[police]
+    for cell, d in zip(thief_pos, thief_dir):
+        key = key * n_cells * 5 + index[cell] * 5 + d
+    return key
+
+
+def unpack_state(layout, key, n_thieves):
+    # (police cell, thief cells, thief directions) of a packed state, as Python ints and lists
+    n_cells = len(layout.spawn_cells)
+    thieves = []
+    for _ in range(n_thieves):
+        key, thief = divmod(key, n_cells * 5)
+        thieves.append(thief)
+    thieves.reverse()
+    cells = layout.spawn_cell_list
+    return cells[key], [cells[t // 5] for t in thieves], [t % 5 for t in thieves]
@@ -0,0 +1,163 @@
+import queue
+import re
+import struct
+import threading
+import time
+import numpy as np
+
+
+# One record per training episode; actions[a] is how many times action a was taken
+METRICS_DTYPE = np.dtype([("episode", np.int64), ("steps", np.int32), ("reward", np.float32),
+                          ("loss", np.float32), ("actions", np.int32, (5,)), ("wall_time", np.float64)])
+
+# File layout: 16-byte header (magic, version, record size) followed by the raw records
+_MAGIC = b"HSMETRIC"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+
+
+class MetricsWriter:
+    def __init__(self, path, buffer_size=4096):
+        # Append-only binary log. Records are collected in a preallocated buffer; a full buffer is
+        # handed to a writer thread and a second one is filled meanwhile, so the training loop
+        # never waits for the disk.
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, "ab")
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION, METRICS_DTYPE.itemsize))
+        else:
+            _check_header(path)
+            # Drop a partial record left by a writer that crashed mid-write, so that new records
+            # start on a record boundary
+            whole = _HEADER.size + (size - _HEADER.size) // METRICS_DTYPE.itemsize * METRICS_DTYPE.itemsize
+            if whole != size:
+                self._file.truncate(whole)
+        self._buffer = np.zeros(buffer_size, dtype=METRICS_DTYPE)
+        self._spare = queue.Queue()
+        self._spare.put(np.zeros(buffer_size, dtype=METRICS_DTYPE))
+        self._n = 0
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def log(self, episode, steps, reward, loss=np.nan, actions=(0, 0, 0, 0, 0), wall_time=None):
+        row = self._buffer[self._n]
+        row["episode"] = episode
+        row["steps"] = steps
+        row["reward"] = reward
+        row["loss"] = loss
+        row["actions"] = actions
+        row["wall_time"] = time.time() if wall_time is None else wall_time
+        self._n += 1
+        if self._n == self.buffer_size:
+            self._hand_off()
+
+    def log_many(self, episode, steps, reward, loss=np.nan, actions=0, wall_time=None):
+        # Arrays (or scalars) with one entry per episode; actions has shape (n, 5)
+        n = len(episode)
+        if wall_time is None:
+            wall_time = time.time()
+        columns = [np.broadcast_to(np.asarray(c), (n,) + METRICS_DTYPE[name].shape)
+                   for name, c in zip(METRICS_DTYPE.names, (episode, steps, reward, loss, actions, wall_time))]
+        start = 0
+        while start < n:
+            k = min(n - start, self.buffer_size - self._n)
+            for name, column in zip(METRICS_DTYPE.names, columns):
+                self._buffer[name][self._n:self._n + k] = column[start:start + k]
+            self._n += k
+            start += k
+            if self._n == self.buffer_size:
+                self._hand_off()
+
+    def _hand_off(self):
+        self._pending.put((self._buffer, self._n))
+        self._buffer = self._spare.get()  # waits only if the writer thread is a full buffer behind
+        self._n = 0
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            buffer, n = item
+            self._file.write(buffer[:n].tobytes())
+            self._file.flush()
+            self._spare.put(buffer)
+
+    def flush(self):
+        # Write everything logged so far (the write still happens on the writer thread)
+        if self._n:
+            self._hand_off()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._pending.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+    magic, version, itemsize = _HEADER.unpack(header)
+    if magic != _MAGIC or version != _VERSION or itemsize != METRICS_DTYPE.itemsize:
+        raise ValueError("{0} is not a version {1} metrics log".format(path, _VERSION))
+
+
+def read_metrics(path):
+    # All records as a read-only memory-mapped structured array (fields as in METRICS_DTYPE); a
+    # record still being written by a MetricsWriter is left out
+    _check_header(path)
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        n = (f.tell() - _HEADER.size) // METRICS_DTYPE.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=METRICS_DTYPE)
+    return np.memmap(path, dtype=METRICS_DTYPE, mode="r", offset=_HEADER.size, shape=(n,))
+
+
+_TEXT_LINE = re.compile(r"Epoch: (\d+), Reward: (-?[\d.]+), Loss: ([-\w.]+), Actions: Counter\(\{(.*)\}\)")
+_TEXT_ACTION = re.compile(r"'\[(\d)\]': (\d+)")
+
+
+def convert_text_log(text_path, path):
+    # Import an old hideandseek_log.txt ("Epoch: ..., Reward: ..., Loss: ..., Actions: Counter(...)"
+    # per episode; its Epoch is the episode length). Returns the number of records written.
+    n = 0
+    with open(text_path) as f, MetricsWriter(path) as writer:
+        for line in f:
+            match = _TEXT_LINE.match(line)
+            if match is None:
+                continue
+            steps, reward, loss, counts = match.groups()
+            actions = np.zeros(5, dtype=np.int32)
+            for a, count in _TEXT_ACTION.findall(counts):
+                actions[int(a)] = int(count)
+            writer.log(n, int(steps), float(reward), float(loss), actions, wall_time=np.nan)
+            n += 1
+    return n
+
+
+# Convert the old text log and summarize it
+if __name__ == "__main__":
+    import sys
+
+    text_path = sys.argv[1] if len(sys.argv) > 1 else "hideandseek_log.txt"
+    path = sys.argv[2] if len(sys.argv) > 2 else "hideandseek_metrics.bin"
+    print("{0} episodes converted".format(convert_text_log(text_path, path)))
+
+    start = time.perf_counter()
+    log = read_metrics(path)
+    print("{0} records loaded in {1:.2f} ms".format(len(log), 1000 * (time.perf_counter() - start)))
+    print("mean reward of the last 100 episodes: {0:.1f}".format(log["reward"][-100:].mean()))
+    print("action shares: {0}".format(np.round(log["actions"].sum(axis=0) / log["actions"].sum(), 3)))
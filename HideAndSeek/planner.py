@@ -0,0 +1,140 @@
+import itertools
+from collections import OrderedDict
+import numpy as np
+from hide_and_seek_map import LEGAL_DIRS
+from hide_and_seek_rules import CAUGHT, catch_one, pack_state, unpack_state
+from thief_policies import distance_table
+
+
+class ExpectimaxPlanner:
+    def __init__(self, env, depth=2, gamma=0.999, cache_size=200000, max_outcomes=16, seed=None):
+        # Expectimax search for the police of a HideAndSeekEnv (any number of thieves). The police
+        # nodes take the best of the 5 actions; the thieves' random walks are chance nodes. When
+        # the joint thief moves have more than max_outcomes combinations, max_outcomes of them are
+        # sampled. Leaves are scored by minus the shortest-path distance to the nearest free thief
+        # (the move distance |dx| / 2 + |dy| on maps too large for a DistanceTable).
+        self.layout = env.layout
+        self.n_thieves = env.n_thieves
+        self.depth = depth
+        self.gamma = gamma
+        self.max_outcomes = max_outcomes
+        self.rng = np.random.default_rng(seed)
+        self._distances = distance_table(self.layout)
+
+        # Transposition table: packed state -> (value, search depth), least recently used first.
+        # It is kept between moves, so the subtree searched for one move is reused by the next.
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def act(self, env):
+        # Best police action from the current state of env (first one on ties)
+        q = self.q_values(env.pack_state(), self.depth)
+        return int(np.argmax(q))
+
+    def q_values(self, key, depth):
+        police, thief_pos, thief_dir = unpack_state(self.layout, key, self.n_thieves)
+        layout = self.layout
+        q = []
+        for action in range(5):
+            thief_dir_after = thief_dir
+            if action < 4:
+                if layout.legal_list[police] >> action & 1:
+                    next_police, reward = police + layout.offset_list[action], -1
+                else:
+                    next_police, reward = police, -10
+            else:
+                next_police = police
+                caught, reward = catch_one(layout, police, thief_pos, thief_dir)
+                thief_dir_after = [CAUGHT if c else d for c, d in zip(caught, thief_dir)]
+                if all(d == CAUGHT for d in thief_dir_after):
+                    q.append(reward)
+                    continue
+
+            expected = 0.0
+            for p, moved_pos, moved_dir in self._outcomes(thief_pos, thief_dir_after):
+                expected += p * self.value(pack_state(layout, next_police, moved_pos, moved_dir), depth - 1)
+            q.append(reward + self.gamma * expected)
+        return q
+
+    def value(self, key, depth):
+        if depth == 0:
+            return self.heuristic(key)
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] >= depth:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        v = max(self.q_values(key, depth))
+        self.cache[key] = (v, depth)
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return v
+
+    def heuristic(self, key):
+        police, thief_pos, thief_dir = unpack_state(self.layout, key, self.n_thieves)
+        free = [cell for cell, d in zip(thief_pos, thief_dir) if d != CAUGHT]
+        if not free:
+            return 0.0
+        if self._distances is None:
+            width = self.layout.grid_size[1]
+            police_y, police_x = divmod(police, width)
+            distances = []
+            for cell in free:
+                y, x = divmod(cell, width)
+                distances.append(abs(x - police_x) // 2 + abs(y - police_y))
+            return -float(min(distances))
+        index = self.layout.spawn_index_list
+        return -float(self._distances.distances[index[police], [index[cell] for cell in free]].min())
+
+    def _outcomes(self, thief_pos, thief_dir):
+        # (probability, thief cells, thief directions) after the thieves' random walk: every free
+        # thief moves uniformly in one of its open directions (one with none turns east in place)
+        layout = self.layout
+        options = []
+        for cell, d in zip(thief_pos, thief_dir):
+            if d == CAUGHT:
+                options.append([(cell, CAUGHT)])
+            else:
+                options.append([(cell + layout.offset_list[m], m) for m in LEGAL_DIRS[layout.legal_list[cell]]] or [(cell, 0)])
+
+        n = 1
+        for o in options:
+            n *= len(o)
+        if n <= self.max_outcomes:
+            for combo in itertools.product(*options):
+                yield 1.0 / n, [c for c, _ in combo], [m for _, m in combo]
+        else:
+            for _ in range(self.max_outcomes):
+                combo = [o[self.rng.integers(len(o))] for o in options]
+                yield 1.0 / self.max_outcomes, [c for c, _ in combo], [m for _, m in combo]
+
+
+# Play the 3-thief game with the planner
+if __name__ == "__main__":
+    import sys
+    import time
+    from hide_and_seek_3thief import HideAndSeekEnv
+
+    n_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    env = HideAndSeekEnv(seed=0)
+    planner = ExpectimaxPlanner(env, seed=0)
+    rewards, steps, moves, elapsed = [], [], 0, 0.0
+    for _ in range(n_episodes):
+        env.reset()
+        done, total, n = False, 0, 0
+        while not done:
+            start = time.perf_counter()
+            action = planner.act(env)
+            elapsed += time.perf_counter() - start
+            _, reward, done, _ = env.step(action)
+            total += reward
+            n += 1
+        rewards.append(total)
+        steps.append(n)
+        moves += n
+    print("mean reward {0:.1f}, mean steps {1:.1f}, {2:.2f} ms/move, cache hit rate {3:.2f}".format(
+        np.mean(rewards), np.mean(steps), 1000 * elapsed / moves, planner.hits / max(planner.hits + planner.misses, 1)))
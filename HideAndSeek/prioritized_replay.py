@@ -0,0 +1,93 @@
+import numpy as np
+from replay_buffer import ReplayBuffer
+
+
+class SumTree:
+    def __init__(self, size):
+        # Complete binary tree stored in an array: node i has children 2i and 2i+1, the root is
+        # node 1 and leaf j is node n_leaves + j. Every node holds the sum of its subtree.
+        self.size = size
+        self.n_leaves = 1 << max(size - 1, 0).bit_length()
+        self.tree = np.zeros(2 * self.n_leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.n_leaves]
+
+    def update(self, indices, priorities):
+        # Set the leaves, then recompute the sums of their ancestors one level at a time: O(k log N)
+        nodes = np.asarray(indices, dtype=np.int64) + self.n_leaves
+        if nodes.size == 0:
+            return
+        self.tree[nodes] = priorities
+        while True:
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] <= 1:
+                break
+
+    def find(self, values):
+        # Leaf index of each value in [0, total): descend left or right depending on the left
+        # subtree sum, for the whole batch at once
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.n_leaves:
+            left = self.tree[2 * nodes]
+            right = (values >= left) & (self.tree[2 * nodes + 1] > 0)
+            values -= np.where(right, left, 0)
+            nodes = 2 * nodes + right
+        return nodes - self.n_leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    def __init__(self, capacity, obs_shape, obs_dtype=np.uint8, n_envs=1, filename=None,
+                 alpha=0.6, beta=0.4, eps=1e-6):
+        # Transitions are sampled with probability p_i^alpha / sum_k p_k^alpha, where p_i is the
+        # absolute TD error of the last update; beta corrects the bias with importance weights
+        super(PrioritizedReplayBuffer, self).__init__(capacity, obs_shape, obs_dtype, n_envs, filename)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.max_priority = 1.0
+        self.priorities = SumTree(capacity * n_envs)
+        self._env_index = np.arange(n_envs)
+
+    def add(self, obs, action, reward, done):
+        row = super(PrioritizedReplayBuffer, self).add(obs, action, reward, done)
+
+        # The newest row has no next_obs yet and must not be sampled; the row before it becomes
+        # sampleable with the highest priority seen so far
+        self.priorities.update(row * self.n_envs + self._env_index, 0.0)
+        if self._rows > 1:
+            previous = (row - 1) % self.capacity
+            self.priorities.update(previous * self.n_envs + self._env_index, self.max_priority ** self.alpha)
+        return row
+
+    def sample_indices(self, batch_size, rng=None):
+        # Stratified sampling: one value from each of batch_size equal slices of the total priority
+        if len(self) == 0:
+            raise ValueError("not enough transitions in the buffer")
+        u = np.random.random(batch_size) if rng is None else rng.random(batch_size)
+        segment = self.priorities.total() / batch_size
+        return self.priorities.find((np.arange(batch_size) + u) * segment)
+
+    def sample(self, batch_size, beta=None, rng=None):
+        # obs, action, next_obs, reward, done, importance-sampling weights, indices (for update_priorities)
+        indices = self.sample_indices(batch_size, rng)
+        beta = self.beta if beta is None else beta
+        probs = self.priorities[indices] / self.priorities.total()
+        weights = (len(self) * probs) ** -beta
+        weights /= weights.max()
+        return self.get(indices) + (weights.astype(np.float32), indices)
+
+    def update_priorities(self, indices, td_errors):
+        indices = np.asarray(indices)
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)).ravel() + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        # The newest row keeps priority 0 (no next_obs yet) even if add() overwrote a sampled row
+        # there; any other row overwritten since it was sampled takes the new priority as well
+        newest = (self._next - 1) % self.capacity
+        keep = indices // self.n_envs != newest
+        self.priorities.update(indices[keep], priorities[keep] ** self.alpha)
@@ -0,0 +1,45 @@
+from time import perf_counter_ns
+
+
+class StepProfiler:
+    def __init__(self):
+        # Nanoseconds and call counts per phase. Phases are ';'-separated stacks such as
+        # "step;observe;render"; each one holds only the time not spent in a deeper phase.
+        self.ns = {}
+        self.calls = {}
+        self._last = 0
+
+    def start(self):
+        self._last = perf_counter_ns()
+
+    def lap(self, phase):
+        # Charge the time since the last start() / lap() to phase
+        now = perf_counter_ns()
+        self.ns[phase] = self.ns.get(phase, 0) + now - self._last
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self._last = now
+
+    def reset(self):
+        self.ns.clear()
+        self.calls.clear()
+
+    def stats(self):
+        # {phase: {"calls", "total_ns", "mean_ns"}}, most expensive phase first
+        phases = sorted(self.ns, key=self.ns.get, reverse=True)
+        return {phase: {"calls": self.calls[phase], "total_ns": self.ns[phase],
+                        "mean_ns": self.ns[phase] / self.calls[phase]} for phase in phases}
+
+    def folded(self):
+        # Collapsed-stack lines ("step;catch 123456", nanoseconds) for flamegraph.pl or speedscope
+        return "".join("{0} {1}\n".format(phase, ns) for phase, ns in sorted(self.ns.items()))
+
+    def save_folded(self, path):
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def summary(self):
+        total = sum(self.ns.values()) or 1
+        lines = ["{0:32s} {1:>10s} {2:>12s} {3:>7s}".format("phase", "calls", "mean ns", "share")]
+        for phase, s in self.stats().items():
+            lines.append("{0:32s} {1:10d} {2:12.0f} {3:6.1f}%".format(phase, s["calls"], s["mean_ns"], 100.0 * s["total_ns"] / total))
+        return "\n".join(lines)
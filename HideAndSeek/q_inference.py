@@ -0,0 +1,281 @@
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+from checkpoint import is_checkpoint, load_checkpoint, save_checkpoint
+
+
+# Layers of q_network in dqn_algorithm.ipynb, in order: (variable scope, kernel size, stride).
+# The convolutions use SAME padding and ReLU, the first fully connected layer ReLU and the last
+# one no activation.
+CONV_LAYERS = [("Conv", 5, 4), ("Conv_1", 3, 2), ("Conv_2", 3, 1)]
+FC_LAYERS = ["fully_connected", "fully_connected_1"]
+
+# TensorFlow DataType enum -> NumPy dtype for the tensors a checkpoint of the notebook holds
+_TF_DTYPES = {1: np.float32, 2: np.float64, 3: np.int32, 9: np.int64, 10: np.bool_}
+_TABLE_MAGIC = 0xdb4775248b80fb57
+
+
+def _varint(buf, i):
+    value, shift = 0, 0
+    while True:
+        b = buf[i]
+        i += 1
+        value |= (b & 0x7f) << shift
+        shift += 7
+        if b < 0x80:
+            return value, i
+
+
+def _proto_fields(buf):
+    # Minimal protobuf decoder: field number -> list of raw values (ints or bytes)
+    fields, i = {}, 0
+    while i < len(buf):
+        tag, i = _varint(buf, i)
+        wire = tag & 7
+        if wire == 0:
+            value, i = _varint(buf, i)
+        elif wire == 2:
+            n, i = _varint(buf, i)
+            value, i = buf[i:i + n], i + n
+        elif wire == 5:
+            value, i = buf[i:i + 4], i + 4
+        elif wire == 1:
+            value, i = buf[i:i + 8], i + 8
+        else:
+            raise ValueError("unsupported protobuf wire type {0}".format(wire))
+        fields.setdefault(tag >> 3, []).append(value)
+    return fields
+
+
+def _table_block(buf):
+    # Key / value entries of one (uncompressed) block of a LevelDB-style table
+    n_restarts = struct.unpack("<I", buf[-4:])[0]
+    end = len(buf) - 4 - 4 * n_restarts
+    i, key = 0, b""
+    while i < end:
+        shared, i = _varint(buf, i)
+        unshared, i = _varint(buf, i)
+        size, i = _varint(buf, i)
+        key = key[:shared] + buf[i:i + unshared]
+        i += unshared
+        yield key, buf[i:i + size]
+        i += size
+
+
+def read_checkpoint(prefix, scope=None):
+    # Variables of a TensorFlow checkpoint (prefix.index + prefix.data-00000-of-00001, as written
+    # by tf.train.Saver) as NumPy arrays, without TensorFlow. With a scope only its variables are
+    # read and the "scope/" prefix is dropped from their names.
+    with open(prefix + ".index", "rb") as f:
+        index = f.read()
+    footer = index[-48:]
+    if struct.unpack("<Q", footer[-8:])[0] != _TABLE_MAGIC:
+        raise ValueError("{0}.index is not a TensorFlow checkpoint index".format(prefix))
+    i = _varint(footer, _varint(footer, 0)[1])[1]  # skip the meta-index block handle
+    index_offset, i = _varint(footer, i)
+    index_size, i = _varint(footer, i)
+
+    entries = {}
+    for _, handle in _table_block(index[index_offset:index_offset + index_size]):
+        offset, j = _varint(handle, 0)
+        size, j = _varint(handle, j)
+        if index[offset + size] != 0:
+            raise ValueError("compressed checkpoint index blocks are not supported")
+        for key, value in _table_block(index[offset:offset + size]):
+            if key:  # the empty key holds the bundle header
+                entries[key.decode("utf-8")] = _proto_fields(value)
+
+    arrays = {}
+    with open(prefix + ".data-00000-of-00001", "rb") as f:
+        data = f.read()
+    for name, entry in sorted(entries.items()):
+        if scope is not None:
+            if not name.startswith(scope + "/"):
+                continue
+            name = name[len(scope) + 1:]
+        if entry.get(3, [0])[0] != 0:
+            raise ValueError("sharded checkpoints are not supported")
+        dtype = _TF_DTYPES[entry.get(1, [1])[0]]
+        shape = [_proto_fields(d).get(1, [0])[0] for d in _proto_fields(entry[2][0]).get(2, [])] if 2 in entry else []
+        offset, size = entry.get(4, [0])[0], entry.get(5, [0])[0]
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset).reshape(shape).copy()
+    return arrays
+
+
+class QNetwork:
+    def __init__(self, params):
+        # params: variables of one q_network scope ("Conv/weights", "Conv/biases", ...), e.g.
+        # read_checkpoint(prefix, "mainQ")
+        self.params = {name: np.ascontiguousarray(value, dtype=np.float32) for name, value in params.items()}
+        self._conv = []
+        for name, k, stride in CONV_LAYERS:
+            w = self.params[name + "/weights"]  # (k, k, in, out)
+            # im2col windows are laid out (in, k, k), so the kernel is reordered to match once here
+            w_cols = np.ascontiguousarray(w.transpose(2, 0, 1, 3).reshape(-1, w.shape[3]))
+            self._conv.append((k, stride, w_cols, self.params[name + "/biases"]))
+        self._fc = [(self.params[name + "/weights"], self.params[name + "/biases"]) for name in FC_LAYERS]
+
+    @classmethod
+    def from_checkpoint(cls, prefix, scope="mainQ"):
+        # A TensorFlow checkpoint, or one converted with checkpoint.convert_tf_checkpoint (memory-mapped)
+        if is_checkpoint(prefix):
+            return cls(load_checkpoint(prefix, scope=scope))
+        return cls(read_checkpoint(prefix, scope))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        # Weights exported with save(); memory-mapped unless mmap_mode is None
+        return cls(load_checkpoint(path, mmap_mode=mmap_mode))
+
+    def save(self, path):
+        save_checkpoint(path, self.params, {"model": "QNetwork"})
+
+    def forward(self, obs):
+        # Q-values (batch, n_actions) for a batch of observations (batch, H, W, C), same result as
+        # mainQ_outputs.eval(feed_dict={X: obs})
+        x = np.asarray(obs, dtype=np.float32)
+        for k, stride, w_cols, b in self._conv:
+            x = _conv2d_same(x, k, stride, w_cols)
+            x += b
+            np.maximum(x, 0, out=x)
+        x = x.reshape(len(x), -1)  # NHWC order, like tf.contrib.layers.flatten
+        (w1, b1), (w2, b2) = self._fc
+        x = x @ w1
+        x += b1
+        np.maximum(x, 0, out=x)
+        return x @ w2 + b2
+
+    def act(self, obs):
+        # Greedy actions for a batch of observations
+        return np.argmax(self.forward(obs), axis=-1)
+
+
+def _conv2d_same(x, k, stride, w_cols):
+    # TensorFlow SAME padding: output size ceil(n / stride), the odd padding pixel goes after
+    batch, height, width, channels = x.shape
+    out_h, out_w = -(-height // stride), -(-width // stride)
+    pad_h = max((out_h - 1) * stride + k - height, 0)
+    pad_w = max((out_w - 1) * stride + k - width, 0)
+    x = np.pad(x, ((0, 0), (pad_h // 2, pad_h - pad_h // 2), (pad_w // 2, pad_w - pad_w // 2), (0, 0)))
+    windows = np.lib.stride_tricks.sliding_window_view(x, (k, k), axis=(1, 2))[:, ::stride, ::stride]
+    cols = windows.reshape(batch * out_h * out_w, channels * k * k)
+    return (cols @ w_cols).reshape(batch, out_h, out_w, -1)
+
+
+class InferenceServer:
+    def __init__(self, network, max_batch=1024, max_wait=0.0005, latency_window=100000):
+        # Greedy actions for many envs from one network: requests from any number of threads are
+        # queued and a worker thread evaluates them in batches of up to max_batch, waiting at most
+        # max_wait seconds for a batch to fill
+        self.network = network
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.latencies = deque(maxlen=latency_window)  # seconds from submit() to the result
+        self.batch_sizes = deque(maxlen=latency_window)
+        self._queue = queue.Queue()
+        # Held while checking _closed and queueing, so that no request is queued after the stop
+        # marker put by close() (its future would never be resolved)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def submit(self, obs):
+        # Future of the greedy action for one observation
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("the inference server is closed")
+            self._queue.put((obs, future, time.perf_counter()))
+        return future
+
+    def act(self, obs):
+        return self.submit(obs).result()
+
+    def act_many(self, observations):
+        # Actions for a list of observations, which may be batched with other callers' requests
+        futures = [self.submit(obs) for obs in observations]
+        return np.array([f.result() for f in futures])
+
+    def _serve(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)  # finish this batch, then stop
+                    break
+                batch.append(request)
+
+            try:
+                actions = self.network.act(np.stack([obs for obs, _, _ in batch])).tolist()
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            now = time.perf_counter()
+            for (_, future, start), action in zip(batch, actions):
+                future.set_result(action)
+                self.latencies.append(now - start)
+            self.batch_sizes.append(len(batch))
+
+    def latency_percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        # Request latency percentiles in microseconds over the last latency_window requests
+        if not self.latencies:
+            return {}
+        values = np.percentile(np.array(self.latencies), percentiles) * 1e6
+        return {p: float(v) for p, v in zip(percentiles, values)}
+
+    def close(self):
+        # Requests submitted before close() are still answered
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Load the notebook's checkpoint and serve greedy actions for a batch of 3-thief envs
+if __name__ == "__main__":
+    import sys
+    from vector_hide_and_seek import VectorHideAndSeekEnv
+
+    prefix = sys.argv[1] if len(sys.argv) > 1 else "model-1306635"
+    network = QNetwork.from_checkpoint(prefix)
+
+    env = VectorHideAndSeekEnv(1024, seed=0)
+    obs = env.reset()
+    for batch in (1, 64, 1024):
+        start = time.perf_counter()
+        for _ in range(20):
+            network.act(obs[:batch])
+        elapsed = (time.perf_counter() - start) / 20
+        print("batch {0}: {1:.1f} us per action".format(batch, 1e6 * elapsed / batch))
+
+    # Many clients submitting single observations through the micro-batching queue
+    with InferenceServer(network) as server:
+        for _ in range(20):
+            actions = server.act_many(list(obs))
+            obs, _, _, _ = env.step(actions)
+        mean_batch = np.mean(server.batch_sizes)
+        print("server: mean batch {0:.0f}, latency us {1}".format(
+            mean_batch, {p: round(v) for p, v in server.latency_percentiles().items()}))
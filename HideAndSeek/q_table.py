@@ -0,0 +1,108 @@
+import numpy as np
+from checkpoint import load_checkpoint, save_checkpoint
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+class QTable:
+    def __init__(self, n_states, n_actions, values=None, dtype=np.float32):
+        # Contiguous (n_states, n_actions) array of Q-values, indexed by HideAndSeekEnv.encode states
+        if values is None:
+            values = np.zeros((n_states, n_actions), dtype=dtype)
+        self.values = values
+        self.n_states, self.n_actions = values.shape
+
+    def greedy(self, states):
+        # Best action for one state or an array of states (first action on ties, like max(..., key=))
+        return np.argmax(self.values[states], axis=-1)
+
+    def act(self, states, epsilon, rng=None):
+        # Epsilon-greedy actions for an array of states
+        rng = rng or np.random.default_rng()
+        states = np.asarray(states)
+        actions = self.greedy(states)
+        explore = rng.random(states.shape) < epsilon
+        return np.where(explore, rng.integers(self.n_actions, size=states.shape), actions)
+
+    def update(self, states, actions, rewards, next_states, dones, alpha, gamma):
+        # One Q-learning step for a batch of transitions; the next state of a finished episode is not
+        # bootstrapped. Transitions hitting the same (state, action) add up their updates.
+        target = rewards + gamma * self.values[next_states].max(axis=-1) * (1 - np.asarray(dones, dtype=self.values.dtype))
+        td = target - self.values[states, actions]
+        np.add.at(self.values, (states, actions), (alpha * td).astype(self.values.dtype))
+        return td
+
+    def save(self, path):
+        # path.json + path.data (see checkpoint.py)
+        save_checkpoint(path, {"values": self.values}, {"model": "QTable"})
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        # A checkpoint written by save(), or an older .npy file. mmap_mode='r' shares one read-only
+        # copy of the table between processes, 'r+' trains in place
+        if path.endswith(".npy"):
+            return cls(None, None, values=np.load(path, mmap_mode=mmap_mode))
+        return cls(None, None, values=load_checkpoint(path, names=["values"], mmap_mode=mmap_mode)["values"])
+
+
+class QLearningTrainer:
+    def __init__(self, q=None, n_envs=256, alpha=0.4, gamma=0.999, epsilon=0.017, seed=None):
+        # Tabular Q-learning on the 1-thief game, n_envs episodes played in parallel by a
+        # VectorHideAndSeekEnv
+        self.env = VectorHideAndSeekEnv(n_envs, n_thieves=1, obs_type='discrete', seed=seed)
+        self.q = q if q is not None else QTable(self.env.single_observation_space.n, self.env.single_action_space.n)
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.episodes = 0
+
+    def train(self, n_episodes, metrics=None):
+        # Returns the total reward and length of each of the first n_episodes finished episodes.
+        # With a metrics_log.MetricsWriter those episodes are also logged, with the number of
+        # actions taken (including the final catch, like the "Epoch" of the old text log) as steps
+        # and the mean squared TD error per action as loss.
+        env = self.env
+        states = env.reset()
+        episode_rewards = np.zeros(env.num_envs, dtype=np.int64)
+        episode_td2 = np.zeros(env.num_envs, dtype=np.float64)
+        episode_actions = np.zeros((env.num_envs, env.single_action_space.n), dtype=np.int32)
+        rows = np.arange(env.num_envs)
+        rewards_log, steps_log = [], []
+        finished = 0
+        while finished < n_episodes:
+            actions = self.q.act(states, self.epsilon, self.rng)
+            next_states, rewards, dones, info = env.step(actions)
+            td = self.q.update(states, actions, rewards, next_states, dones, self.alpha, self.gamma)
+            episode_rewards += rewards
+            if metrics is not None:
+                episode_td2 += td ** 2
+                episode_actions[rows, actions] += 1
+            if dones.any():
+                rewards_log.append(episode_rewards[dones])
+                steps_log.append(info["episode_steps"])
+                if metrics is not None:
+                    k = min(int(dones.sum()), n_episodes - finished)
+                    actions_taken = episode_actions[dones][:k]
+                    n_actions = actions_taken.sum(axis=1)
+                    metrics.log_many(self.episodes + np.arange(k), n_actions, episode_rewards[dones][:k],
+                                     episode_td2[dones][:k] / n_actions, actions_taken)
+                    episode_td2[dones] = 0
+                    episode_actions[dones] = 0
+                episode_rewards[dones] = 0
+                finished += int(dones.sum())
+                self.episodes += int(dones.sum())
+            states = next_states
+        return np.concatenate(rewards_log)[:n_episodes], np.concatenate(steps_log)[:n_episodes]
+
+
+# Train on the 1-thief env and save the table
+if __name__ == "__main__":
+    import time
+    from metrics_log import MetricsWriter
+
+    trainer = QLearningTrainer(seed=0)
+    start = time.perf_counter()
+    with MetricsWriter("q_learning_metrics.bin") as metrics:
+        rewards, steps = trainer.train(20000, metrics)
+    print("20000 episodes in {0:.1f}s, mean reward of the last 1000: {1:.1f}".format(time.perf_counter() - start, rewards[-1000:].mean()))
+    trainer.q.save("q_table")
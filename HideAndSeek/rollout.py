@@ -0,0 +1,154 @@
+import multiprocessing as mp
+import numpy as np
+import random
+from gym import spaces
+from hide_and_seek_3thief import HideAndSeekEnv
+
+
+def _shared_array(shape, dtype):
+    # NumPy view over an unsynchronized shared-memory block, inherited by the worker processes
+    dtype = np.dtype(dtype)
+    raw = mp.RawArray('b', max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return raw, _as_array(raw, shape, dtype)
+
+
+def _as_array(raw, shape, dtype):
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _worker(make_env, env_kwargs, seed, lo, hi, blocks, conn):
+    # Each env gets its own seed from the worker seed; the global random / np.random generators
+    # (per process) are seeded too for envs that use them
+    random.seed(seed)
+    np.random.seed(seed)
+
+    obs, actions, rewards, dones = [_as_array(*block) for block in blocks]
+    envs = [make_env(**env_kwargs) for _ in range(hi - lo)]
+    for env, env_seed in zip(envs, np.random.SeedSequence(seed).generate_state(hi - lo)):
+        env.reset(seed=int(env_seed))
+    try:
+        while True:
+            cmd = conn.recv()
+            if cmd == 'step':
+                for i, env in enumerate(envs, lo):
+                    o, r, d, _ = env.step(actions[i])
+                    if d:
+                        o = env.reset()
+                    obs[i] = o
+                    rewards[i] = r
+                    dones[i] = d
+            elif cmd == 'reset':
+                for i, env in enumerate(envs, lo):
+                    obs[i] = env.reset()
+            elif cmd == 'close':
+                break
+            conn.send(cmd)
+    finally:
+        conn.close()
+
+
+class RolloutWorkers:
+    def __init__(self, make_env=HideAndSeekEnv, n_workers=None, envs_per_worker=8, seed=0, env_kwargs=None):
+        # Runs n_workers processes, each stepping envs_per_worker envs built by make_env(**env_kwargs)
+        # (e.g. the HideAndSeekEnv class of hide_and_seek_1thief.py or hide_and_seek_3thief.py).
+        # Observations, rewards and dones are written into shared memory; only short commands go
+        # through the pipes. Finished episodes are reset inside the workers.
+        self.n_workers = n_workers or mp.cpu_count()
+        self.envs_per_worker = envs_per_worker
+        self.num_envs = self.n_workers * envs_per_worker
+        env_kwargs = env_kwargs or {}
+
+        probe = make_env(**env_kwargs)
+        self.single_action_space = probe.action_space
+        self.single_observation_space = probe.observation_space
+        if isinstance(probe.observation_space, spaces.Discrete):
+            obs_shape, obs_dtype = (), np.int64
+        else:
+            obs_shape, obs_dtype = probe.observation_space.shape, probe.observation_space.dtype
+
+        specs = [((self.num_envs,) + tuple(obs_shape), obs_dtype), ((self.num_envs,), np.int64),
+                 ((self.num_envs,), np.float32), ((self.num_envs,), np.bool_)]
+        blocks, arrays = [], []
+        for shape, dtype in specs:
+            raw, array = _shared_array(shape, dtype)
+            blocks.append((raw, shape, dtype))
+            arrays.append(array)
+        self.obs, self.actions, self.rewards, self.dones = arrays
+
+        # Deterministic, independent seed for every worker
+        seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(self.n_workers)]
+        self._conns = []
+        self._procs = []
+        for w in range(self.n_workers):
+            parent, child = mp.Pipe()
+            lo = w * envs_per_worker
+            proc = mp.Process(target=_worker, args=(make_env, env_kwargs, seeds[w], lo, lo + envs_per_worker, blocks, child),
+                              daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self._waiting = False
+        self.closed = False
+
+    def _send(self, cmd):
+        for conn in self._conns:
+            conn.send(cmd)
+
+    def _wait(self):
+        for conn in self._conns:
+            conn.recv()
+
+    def reset(self):
+        self._send('reset')
+        self._wait()
+        return self.obs
+
+    def step_async(self, actions):
+        # Start stepping all envs; the learner can work until step_wait()
+        self.actions[:] = np.asarray(actions).reshape(self.num_envs)
+        self._send('step')
+        self._waiting = True
+
+    def step_wait(self):
+        # The returned arrays are views of the shared blocks and are overwritten by the next step
+        self._wait()
+        self._waiting = False
+        return self.obs, self.rewards, self.dones
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            self._wait()
+        self._send('close')
+        for proc in self._procs:
+            proc.join()
+        for conn in self._conns:
+            conn.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Measure the collection throughput for 1..cpu_count workers
+if __name__ == "__main__":
+    import time
+
+    for n_workers in sorted({1, max(mp.cpu_count() // 2, 1), mp.cpu_count()}):
+        with RolloutWorkers(n_workers=n_workers, envs_per_worker=16) as workers:
+            workers.reset()
+            n_steps = 200
+            start = time.perf_counter()
+            for _ in range(n_steps):
+                workers.step(np.random.randint(5, size=workers.num_envs))
+            elapsed = time.perf_counter() - start
+        print("{0} workers: {1} env steps/sec".format(n_workers, int(n_steps * workers.num_envs / elapsed)))
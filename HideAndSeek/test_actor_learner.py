@@ -0,0 +1,45 @@
+import time
+import numpy as np
+import pytest
+from actor_learner import ActorLearner, QTableLearner, ReplayShards
+from hide_and_seek_map import DEFAULT_MAP, compile_map
+from hide_and_seek_rules import n_states
+from prioritized_replay import PrioritizedReplayBuffer
+from q_table import QTable
+from replay_buffer import ReplayBuffer
+
+
+def make_pipeline(prioritized):
+    q = QTable(n_states(compile_map(DEFAULT_MAP)), 5)
+    return ActorLearner(QTableLearner(q), n_actors=2, envs_per_actor=8, env_kwargs={"n_thieves": 1},
+                        make_policy=lambda weights: QTable(None, None, values=weights["values"]).greedy,
+                        prioritized=prioritized, start_transitions=200, broadcast_interval=10)
+
+
+@pytest.mark.parametrize("prioritized", [False, True])
+def test_learner_trains_while_actors_run(prioritized):
+    # The actors keep the queue full; run() must still train and return at its deadline
+    with make_pipeline(prioritized) as pipeline:
+        start = time.perf_counter()
+        stats = pipeline.run(seconds=1.0)
+        assert time.perf_counter() - start < 3.0
+        assert stats["updates"] > 0 and stats["samples"] >= 200
+        stats = pipeline.run(n_updates=5)
+        assert stats["updates"] >= 6 and stats["broadcasts"] >= 1
+
+
+@pytest.mark.parametrize("prioritized", [False, True])
+def test_replay_shards_sample_and_update(prioritized):
+    make = (lambda: PrioritizedReplayBuffer(10, (), np.int64, 2)) if prioritized else (lambda: ReplayBuffer(10, (), np.int64, 2))
+    shards = ReplayShards([make(), make()])
+    for t in range(6):
+        # Observations encode shard, row and env so a sample can be traced back
+        for shard in range(2):
+            shards.add(shard, np.array([shard * 100 + t * 10, shard * 100 + t * 10 + 1]), [t, t], [0.0, 0.0], [False, False])
+    obs, actions, next_obs, rewards, dones, weights, indices = shards.sample(64, rng=np.random.default_rng(0))
+    assert len(obs) == 64 and (next_obs == obs + 10).all() and (actions == obs % 100 // 10).all()
+    shard = indices // 20
+    assert (obs // 100 == shard).all()
+    if prioritized:
+        shards.update_priorities(indices, np.ones(64))
+        assert (weights > 0).all() and weights.max() == 1
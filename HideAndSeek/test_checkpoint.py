@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import pytest
+from checkpoint import ALIGNMENT, load_checkpoint, read_manifest, save_checkpoint
+from q_table import QTable
+
+
+def make_arrays():
+    rng = np.random.default_rng(0)
+    return {"mainQ/conv/weights": rng.standard_normal((3, 3, 1, 4)).astype(np.float32),
+            "mainQ/conv/biases": rng.standard_normal(4).astype(np.float32),
+            "targetQ/conv/biases": np.arange(5, dtype=np.int16),
+            "empty": np.zeros((0, 3)), "scalar": np.array(7, dtype=np.int64)}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "model")
+    arrays = make_arrays()
+    save_checkpoint(path, arrays, {"step": 3})
+    manifest = read_manifest(path)
+    assert manifest["metadata"] == {"step": 3}
+    assert all(entry["offset"] % ALIGNMENT == 0 for entry in manifest["arrays"].values())
+
+    for mmap_mode in ('r', 'c', None):
+        loaded = load_checkpoint(path, mmap_mode=mmap_mode)
+        assert sorted(loaded) == sorted(arrays)
+        for name, array in arrays.items():
+            assert loaded[name].dtype == array.dtype and np.array_equal(loaded[name], array)
+    assert not load_checkpoint(path)["mainQ/conv/biases"].flags.writeable
+
+
+def test_partial_loading(tmp_path):
+    path = str(tmp_path / "model")
+    arrays = make_arrays()
+    save_checkpoint(path, arrays)
+    assert list(load_checkpoint(path, names=["scalar"])) == ["scalar"]
+    main = load_checkpoint(path, scope="mainQ")
+    assert sorted(main) == ["conv/biases", "conv/weights"]
+    assert np.array_equal(main["conv/weights"], arrays["mainQ/conv/weights"])
+    with pytest.raises(KeyError):
+        load_checkpoint(path, names=["missing"])
+
+
+def test_truncated_data_is_rejected(tmp_path):
+    path = str(tmp_path / "model")
+    save_checkpoint(path, make_arrays())
+    with open(path + ".data", "r+b") as f:
+        f.truncate(os.path.getsize(path + ".data") - ALIGNMENT)
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+
+def test_q_table_save_load(tmp_path):
+    q = QTable(10, 5, values=np.random.default_rng(0).standard_normal((10, 5)).astype(np.float32))
+    q.save(str(tmp_path / "q_table"))
+    assert np.array_equal(QTable.load(str(tmp_path / "q_table")).values, q.values)
+
+    # Training in place through a writable mapping reaches the file
+    mapped = QTable.load(str(tmp_path / "q_table"), mmap_mode='r+')
+    mapped.values[3, 1] = 42
+    mapped.values.flush()
+    assert QTable.load(str(tmp_path / "q_table")).values[3, 1] == 42
+
+    # Older tables saved with np.save
+    np.save(str(tmp_path / "old.npy"), q.values)
+    assert np.array_equal(QTable.load(str(tmp_path / "old.npy"), mmap_mode='r').values, q.values)
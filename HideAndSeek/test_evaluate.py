@@ -0,0 +1,74 @@
+import numpy as np
+from evaluate import EpisodeLog, EvaluationStats, _play_episodes, evaluate_batched, read_episode_log
+import hide_and_seek_1thief
+
+
+def test_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    stats = EvaluationStats(n_thieves=3, max_steps=500)
+    reward = rng.integers(-5000, 300, size=5000)
+    steps = rng.integers(1, 501, size=5000)
+    caught = rng.integers(0, 4, size=5000)
+    truncated = rng.random(5000) < 0.1
+    for s in range(0, 5000, 700):
+        stats.update(reward[s:s + 700], steps[s:s + 700], caught[s:s + 700], truncated[s:s + 700])
+
+    success = (caught == 3) & ~truncated
+    summary = stats.summary()
+    assert summary["episodes"] == 5000 and summary["truncated"] == truncated.sum()
+    assert np.isclose(summary["catch_rate"], success.mean())
+    assert np.isclose(summary["reward_mean"], reward.mean()) and np.isclose(summary["reward_std"], reward.std())
+    assert np.isclose(summary["steps_to_catch_mean"], steps[success].mean())
+    assert np.isclose(summary["steps_to_catch_std"], steps[success].std())
+    for q in (0.05, 0.5, 0.95):
+        # Steps have one bin per value; rewards bins of width 10 reported by their centre
+        assert summary["steps_to_catch_q{0:g}".format(100 * q)] == np.quantile(steps[success], q, method='inverted_cdf')
+        assert abs(summary["reward_q{0:g}".format(100 * q)] - np.quantile(reward, q, method='inverted_cdf')) <= 5
+
+
+def test_rolling_window_is_in_episode_order():
+    stats = EvaluationStats(n_thieves=1, window=4)
+    episode = np.array([5, 0, 3, 1, 4, 2])
+    caught = np.array([1, 0, 1, 0, 0, 1])
+    stats.update(np.zeros(6), np.ones(6, dtype=np.int64), caught, np.zeros(6, dtype=bool), episode)
+    # Episodes 2-5, not the last four to finish
+    assert list(stats._recent) == [True, True, False, True]
+
+
+def test_episode_log_chunks(tmp_path):
+    directory = str(tmp_path / "log")
+    rows = {"episode": np.arange(20), "reward": np.linspace(-10, 100, 20), "steps": np.arange(20) + 1,
+            "caught": np.arange(20) % 4, "truncated": np.arange(20) % 3 == 0}
+    with EpisodeLog(directory, chunk_size=7) as log:
+        for s, e in [(0, 3), (3, 15), (15, 20)]:
+            log.append(**{name: column[s:e] for name, column in rows.items()})
+    chunks = list(read_episode_log(directory))
+    assert [len(c["episode"]) for c in chunks] == [7, 7, 6]
+    for name, column in rows.items():
+        assert np.allclose(np.concatenate([c[name] for c in chunks]), column)
+
+    # Reopening appends new chunks after the existing ones
+    with EpisodeLog(directory, chunk_size=7) as log:
+        log.append(**{name: column[:2] for name, column in rows.items()})
+    assert [len(c["episode"]) for c in read_episode_log(directory)] == [7, 7, 6, 2]
+
+
+def test_batched_records_exactly_the_first_episodes(tmp_path):
+    rng = np.random.default_rng(0)
+    stats = evaluate_batched(lambda obs: rng.integers(5, size=len(obs)), 50, num_envs=16, n_thieves=1,
+                             max_steps=100, log_dir=str(tmp_path))
+    episodes = np.concatenate([c["episode"] for c in read_episode_log(str(tmp_path))])
+    assert stats.episodes == 50 and sorted(episodes.tolist()) == list(range(50))
+
+
+def test_batched_and_scalar_paths_count_steps_alike(tmp_path):
+    # Always catching: every action but a successful last one costs -10, so a caught episode of
+    # n actions has the reward 100 - 10 * (n - 1) when the final catch is counted
+    stats = evaluate_batched(lambda obs: np.full(len(obs), 4), 100, num_envs=32, n_thieves=1, max_steps=300,
+                             log_dir=str(tmp_path))
+    log = {name: np.concatenate([c[name] for c in read_episode_log(str(tmp_path))]) for name in ("reward", "steps", "truncated")}
+    reward, steps, _, truncated = _play_episodes(hide_and_seek_1thief.HideAndSeekEnv, lambda env: lambda obs: 4, 300, range(100))
+    for reward, steps, truncated in [(log["reward"], log["steps"], log["truncated"]), (reward, steps, truncated)]:
+        assert (~truncated).any()
+        assert (reward[~truncated] == 100 - 10 * (steps[~truncated] - 1)).all()
+        assert (steps[truncated] == 300).all()
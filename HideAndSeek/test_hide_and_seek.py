@@ -0,0 +1,42 @@
+import numpy as np
+import hide_and_seek_3thief
+from hide_and_seek_rules import pack_state, unpack_state
+
+
+def test_pack_state_round_trip():
+    env = hide_and_seek_3thief.HideAndSeekEnv(seed=0)
+    rng = np.random.default_rng(0)
+    cells = env.layout.spawn_cell_list
+    for _ in range(200):
+        police = cells[rng.integers(len(cells))]
+        thief_pos = [cells[i] for i in rng.integers(len(cells), size=3)]
+        thief_dir = rng.integers(5, size=3).tolist()
+        key = pack_state(env.layout, police, thief_pos, thief_dir)
+        assert unpack_state(env.layout, key, 3) == (police, thief_pos, thief_dir)
+
+        env.police, env.thief_pos, env.thief_dir = police, thief_pos, thief_dir
+        assert env.pack_state() == key
+        env.reset()
+        env.unpack_state(key)
+        assert (env.police, env.thief_pos, env.thief_dir) == (police, thief_pos, thief_dir)
+
+
+def test_set_state_replays_the_same_game():
+    env = hide_and_seek_3thief.HideAndSeekEnv(seed=0)
+    actions = np.random.default_rng(0).integers(5, size=50).tolist()
+    for action in actions[:20]:
+        env.step(action)
+    snapshot = env.get_state()
+
+    def play():
+        results = []
+        for action in actions[20:]:
+            obs, reward, done, _ = env.step(action)
+            results.append((obs.tobytes(), reward, done, env.pack_state()))
+        return results
+
+    first = play()
+    env.reset()
+    env.set_state(snapshot)
+    assert env.get_state()[:2] == snapshot[:2]
+    assert play() == first
@@ -0,0 +1,60 @@
+from collections import deque
+import numpy as np
+import hide_and_seek_map
+from hide_and_seek_map import DEFAULT_MAP, compile_map, generate_maze
+
+
+def reachable(layout, source):
+    seen, queue = {source}, deque([source])
+    while queue:
+        for nxt in layout.neighbours(queue.popleft()).tolist():
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return seen
+
+
+def n_passages(layout):
+    # Open walls between neighbouring cells, each counted once
+    return sum(bin(m).count("1") for m in layout.legal_moves[layout.spawn_cells].tolist()) // 2
+
+
+def test_maze_is_connected():
+    for width, height, seed, loops in [(12, 9, 0, 0.0), (7, 3, 1, 0.0), (20, 15, 2, 0.3), (1, 1, 3, 0.0)]:
+        rows = generate_maze(width, height, seed=seed, loops=loops)
+        layout = compile_map(rows)
+        assert len(rows) == height + 2 and all(len(row) == 2 * width + 1 for row in rows)
+        assert layout.spawn_index[layout.cell(1, 1)] >= 0
+        assert reachable(layout, layout.cell(1, 1)) == set(layout.spawn_cell_list)
+
+
+def test_maze_is_deterministic_under_a_seed():
+    assert generate_maze(15, 11, seed=5, loops=0.2) == generate_maze(15, 11, seed=5, loops=0.2)
+    assert generate_maze(15, 11, seed=5) != generate_maze(15, 11, seed=6)
+
+
+def test_maze_loops():
+    # Without loops the passages form a spanning tree over the rooms; loops only open more walls
+    tree = compile_map(generate_maze(15, 11, seed=0))
+    assert n_passages(tree) == len(tree.spawn_cells) - 1
+    previous = n_passages(tree)
+    for loops in (0.2, 0.5, 1.0):
+        layout = compile_map(generate_maze(15, 11, seed=0, loops=loops))
+        assert n_passages(layout) > previous
+        previous = n_passages(layout)
+    # Every wall is open: 14 passages along each of the 6 room rows, and 15 openings (cells
+    # themselves, with a passage north and south) in each of the 5 rows between them
+    assert previous == 6 * 14 + 5 * 15 * 2
+
+
+def test_compile_map_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(hide_and_seek_map, "MAX_CACHED_MAPS", 3)
+    monkeypatch.setattr(hide_and_seek_map, "_maps", hide_and_seek_map.OrderedDict())
+    default = compile_map(DEFAULT_MAP)
+    assert compile_map(list(DEFAULT_MAP)) is default
+    for seed in range(5):
+        compile_map(generate_maze(5, 5, seed=seed))
+        # The layout in use is kept
+        assert compile_map(DEFAULT_MAP) is default
+    assert len(hide_and_seek_map._maps) == 3
+    assert compile_map(generate_maze(5, 5, seed=0)) is not compile_map(generate_maze(5, 5, seed=0), cache=False)
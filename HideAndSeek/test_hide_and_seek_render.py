@@ -0,0 +1,81 @@
+import numpy as np
+from hide_and_seek import HideAndSeekEnv
+from hide_and_seek_map import generate_maze
+from hide_and_seek_render import ObservationRenderer
+
+
+def states(n_steps=80, seed=0):
+    # (police, thieves, hiding) along a random episode with several thieves, some of them caught
+    env = HideAndSeekEnv(n_thieves=5, obs_mode='planes', seed=seed)
+    env.reset()
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(n_steps):
+        result.append((env.police, list(zip(env.thief_pos, env.thief_dir)), env.is_thief_hiding()))
+        _, _, done, _ = env.step(int(rng.integers(5)))
+        if done:
+            env.reset()
+    return result
+
+
+def check_ring(mode, view=None, n_buffers=3):
+    layout = HideAndSeekEnv(n_thieves=5).layout
+    fresh = ObservationRenderer(layout, mode, view=view)
+    ring = ObservationRenderer(layout, mode, n_buffers, view=view)
+    out = np.empty(fresh.shape, dtype=np.uint8)
+    returned = []
+    for t, state in enumerate(states()):
+        expected = fresh.render(*state)
+        if t % 7 == 3:
+            # Rendering into out= leaves the ring and its dirty cells alone
+            assert ring.render(*state, out=out) is out
+            assert np.array_equal(out, expected)
+            continue
+        obs = ring.render(*state)
+        returned.append((obs, expected.copy()))
+        # Every observation of the last n_buffers renders is still intact after the wrap-around
+        for previous, previous_expected in returned[-n_buffers:]:
+            assert np.array_equal(previous, previous_expected)
+    # The ring hands out n_buffers arrays in turn
+    assert np.shares_memory(returned[0][0], returned[n_buffers][0])
+    assert not np.shares_memory(returned[0][0], returned[1][0])
+
+
+def test_ring_matches_fresh_renders():
+    check_ring('dqn')
+
+
+def test_ring_matches_fresh_renders_planes():
+    check_ring('planes')
+
+
+def test_ring_matches_fresh_renders_view():
+    check_ring('dqn', view=(5, 7))
+    check_ring('planes', view=(5, 7), n_buffers=2)
+
+
+def test_caught_thieves_are_drawn():
+    # The episode above catches thieves, so the 'planes' caught channel is exercised
+    assert any(d == 4 for _, thieves, _ in states() for _, d in thieves)
+
+
+def test_view_is_a_crop_of_the_full_render():
+    # Outside the map reads as 0 in 'dqn' mode and as a wall in 'planes' mode
+    rows = generate_maze(9, 7, seed=0, loops=0.2)
+    h, w = 7, 9
+    for mode, fill in (('dqn', [0]), ('planes', [1, 0, 0, 0, 0])):
+        full = HideAndSeekEnv(n_thieves=4, map=rows, obs_mode=mode, seed=1)
+        view = HideAndSeekEnv(n_thieves=4, map=rows, obs_mode=mode, seed=1, view=(h, w))
+        obs, view_obs = full.reset(), view.reset()
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            padded = np.stack([np.pad(obs[..., c], ((h, h), (w, w)), constant_values=fill[c]) for c in range(len(fill))], axis=-1)
+            x, y = full.layout.position(full.police)
+            top, left = h + y - h // 2, w + x - w // 2
+            assert view_obs.shape == (h, w, len(fill))
+            assert np.array_equal(view_obs, padded[top:top + h, left:left + w])
+            action = int(rng.integers(5))
+            obs, _, done, _ = full.step(action)
+            view_obs = view.step(action)[0]
+            if done:
+                obs, view_obs = full.reset(), view.reset()
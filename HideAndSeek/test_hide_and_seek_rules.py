@@ -0,0 +1,71 @@
+import numpy as np
+from hide_and_seek import HideAndSeekEnv
+from hide_and_seek_map import EAST, NORTH, SOUTH, WEST, compile_map
+from hide_and_seek_rules import CAUGHT, thief_sees_police, thief_sees_police_one
+
+# Row 1 is split by a wall between x = 3 and x = 5; row 3 is an open corridor; from row 1 only
+# x = 3, 5 and 7 lead south
+SIGHT_MAP = [
+    "o-------o",
+    "|   |   |",
+    "|-| |   |",
+    "|       |",
+    "o-------o",
+]
+
+
+def sees(layout, police, thief, d):
+    # Both versions of the rule must agree
+    one = thief_sees_police_one(layout, layout.cell(*police), layout.cell(*thief), d)
+    array = bool(thief_sees_police(layout, layout.cell(*police), np.array([layout.cell(*thief)]), np.array([d]))[0])
+    assert one == array
+    return one
+
+
+def test_sight_table():
+    layout = compile_map(SIGHT_MAP)
+    assert layout.sight[layout.cell(1, 3)].tolist() == [3, 0, 0, 0]
+    assert layout.sight[layout.cell(1, 1)].tolist() == [1, 0, 0, 0]
+    assert layout.sight[layout.cell(5, 1)].tolist() == [1, 0, 2, 0]
+    assert layout.sight[layout.cell(3, 3)].tolist() == [2, 1, 0, 2]
+
+
+def test_open_corridor():
+    layout = compile_map(SIGHT_MAP)
+    assert sees(layout, (7, 3), (1, 3), EAST)
+    assert sees(layout, (1, 3), (7, 3), WEST)
+    assert sees(layout, (3, 1), (3, 3), NORTH)
+    assert sees(layout, (3, 3), (3, 1), SOUTH)
+    # Standing on the thief's cell counts as seen
+    assert sees(layout, (1, 3), (1, 3), NORTH)
+
+
+def test_walls_block_sight():
+    layout = compile_map(SIGHT_MAP)
+    # Same row, wall in between
+    assert not sees(layout, (5, 1), (1, 1), EAST)
+    assert not sees(layout, (7, 1), (3, 1), EAST)
+    assert not sees(layout, (1, 1), (5, 1), WEST)
+    # Same column, wall in between
+    assert not sees(layout, (1, 3), (1, 1), SOUTH)
+    assert not sees(layout, (1, 1), (1, 3), NORTH)
+
+
+def test_sight_range_and_direction():
+    layout = compile_map(SIGHT_MAP)
+    # Up to the wall, in the direction the thief faces and along its own row or column only
+    assert sees(layout, (3, 1), (1, 1), EAST)
+    assert not sees(layout, (1, 3), (7, 3), EAST)
+    assert not sees(layout, (7, 3), (1, 3), WEST)
+    assert not sees(layout, (5, 3), (1, 1), EAST)
+    assert not sees(layout, (3, 3), (1, 1), SOUTH)
+    assert not thief_sees_police_one(layout, layout.cell(7, 3), layout.cell(1, 3), CAUGHT)
+
+
+def test_env_hiding_uses_walls():
+    env = HideAndSeekEnv(n_thieves=1, map=SIGHT_MAP, seed=0)
+    env.police = env.layout.cell(5, 1)
+    env.thief_pos, env.thief_dir = [env.layout.cell(1, 1)], [EAST]
+    assert not env.is_thief_hiding()
+    env.police = env.layout.cell(3, 1)
+    assert env.is_thief_hiding()
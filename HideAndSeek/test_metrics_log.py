@@ -0,0 +1,14 @@
+from metrics_log import MetricsWriter, read_metrics
+
+
+def test_reopen_drops_partial_record(tmp_path):
+    path = str(tmp_path / "metrics.bin")
+    with MetricsWriter(path) as writer:
+        for i in range(5):
+            writer.log(i, 10, 1.0)
+    # A writer that crashed mid-record leaves a partial record at the end
+    with open(path, "ab") as f:
+        f.write(b"\x01" * 17)
+    with MetricsWriter(path) as writer:
+        writer.log_many([5, 6, 7], 10, 1.0)
+    assert read_metrics(path)["episode"].tolist() == list(range(8))
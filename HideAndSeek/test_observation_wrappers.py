@@ -0,0 +1,104 @@
+import os
+import gym
+from gym import spaces
+import numpy as np
+from observation_wrappers import Crop, Downsample, FrameStack, Grayscale, SyntheticFrames, ToUint8, to_float
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class CountingFrames(gym.Env):
+    # Frame t of an episode is filled with start + t; new_api returns (obs, info) and 5-tuples
+    def __init__(self, shape=(2, 3, 1), new_api=False):
+        self.observation_space = spaces.Box(low=0, high=255, shape=shape, dtype=np.uint8)
+        self.action_space = spaces.Discrete(2)
+        self.new_api = new_api
+        self.start = 0
+
+    def reset(self, *, seed=None, options=None):
+        self.t = 0
+        obs = np.full(self.observation_space.shape, self.start, dtype=np.uint8)
+        return (obs, {}) if self.new_api else obs
+
+    def step(self, action):
+        self.t += 1
+        obs = np.full(self.observation_space.shape, self.start + self.t, dtype=np.uint8)
+        return (obs, 0.0, False, False, {}) if self.new_api else (obs, 0.0, False, {})
+
+
+def test_pong_preprocessing_matches_notebook():
+    # The Pong notebook's former per-frame preprocessing, after the deferred normalization
+    color = np.array([210, 164, 74]).mean()
+    source = SyntheticFrames(seed=0, episode_length=50)
+    env = FrameStack(Grayscale(Downsample(Crop(source, rows=slice(35, 195)), 2), erase=(210, 164, 74)), 4)
+    assert env.observation_space.shape == (80, 80, 4) and env.observation_space.dtype == np.uint8
+    obs = env.reset()
+    for t in range(50):
+        frame = source._frame()
+        img = frame[35:195:2, ::2].mean(axis=2)
+        img[img == color] = 0
+        expected = (img - 128) / 128 - 1
+        assert obs.shape == (80, 80, 4) and obs.dtype == np.uint8
+        # The integer mean loses at most 2/3 of a grey level
+        assert np.abs(to_float(obs[..., -1], 1 / 128, -2) - expected).max() <= 1 / 128
+        assert ((obs[..., -1] == 0) == (expected == -2)).all()
+        obs, _, done, _ = env.step(0)
+
+
+def test_crop_and_downsample_are_views():
+    source = SyntheticFrames(seed=0)
+    crop = Crop(source, rows=slice(35, 195), cols=slice(0, 100))
+    env = Downsample(crop, (2, 4))
+    obs = env.reset()
+    assert obs.shape == env.observation_space.shape == (80, 25, 3)
+    frame = source._frame()
+    assert np.array_equal(obs, frame[35:195:2, 0:100:4])
+    assert np.shares_memory(env.observation(crop.observation(frame)), frame)
+
+
+def test_to_uint8_scales_and_clips():
+    env = ToUint8(CountingFrames(), scale=100.0, offset=-50.0)
+    assert env.reset().tolist() == np.zeros((2, 3, 1)).tolist()
+    assert (env.step(0)[0] == 50).all() and (env.step(0)[0] == 150).all() and (env.step(0)[0] == 250).all()
+    assert (env.step(0)[0] == 255).all()
+
+
+def test_frame_stack_order_and_reset():
+    for new_api in (False, True):
+        source = CountingFrames(new_api=new_api)
+        env = FrameStack(source, k=4, keep=1)
+        obs = env.reset()[0] if new_api else env.reset()
+        assert obs.shape == (2, 3, 4) and (obs == 0).all()
+        previous = obs
+        for t in range(1, 40):
+            result = env.step(0)
+            assert len(result) == (5 if new_api else 4)
+            obs = result[0]
+            # Oldest first, the first frame repeated at the start of the episode; the stack returned
+            # one step earlier is still intact (keep=1) across the compaction of the buffer
+            assert obs[0, 0].tolist() == [max(t - 3 + i, 0) for i in range(4)]
+            assert np.array_equal(previous, np.maximum(np.arange(t - 4, t), 0)[None, None, :] + np.zeros((2, 3, 1)))
+            previous = obs
+
+        # A reset mid-episode starts from k copies of the new first frame
+        source.start = 100
+        obs = env.reset()[0] if new_api else env.reset()
+        assert (obs == 100).all()
+        assert env.step(0)[0][0, 0].tolist() == [100, 100, 100, 101]
+
+
+def test_frame_stack_keeps_stacks_valid_for_keep_steps():
+    env = FrameStack(CountingFrames(shape=(1, 1, 1)), k=3, keep=2)
+    stacks = [env.reset()]
+    for t in range(1, 30):
+        stacks.append(env.step(0)[0])
+        # The stacks returned by the last two steps still hold their frames
+        for s in range(max(t - 2, 0), t + 1):
+            assert stacks[s][0, 0].tolist() == [max(s - 2 + i, 0) for i in range(3)]
+
+
+def test_pong_copies_match():
+    # PongGame keeps copies of the modules its notebook imports
+    for name in ("observation_wrappers.py", "replay_buffer.py"):
+        with open(os.path.join(HERE, name)) as f, open(os.path.join(HERE, "..", "PongGame", name)) as g:
+            assert f.read() == g.read(), name
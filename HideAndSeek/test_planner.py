@@ -0,0 +1,81 @@
+import numpy as np
+from hide_and_seek_1thief import HideAndSeekEnv
+from hide_and_seek_rules import decode_state, pack_state
+from planner import ExpectimaxPlanner
+from value_iteration import TransitionModel, initial_states
+
+
+class ZeroLeaves(ExpectimaxPlanner):
+    # Without a leaf heuristic a depth-d search computes the d-step values of the game
+    def heuristic(self, key):
+        return 0.0
+
+
+def valid_states(layout, model):
+    police, thief, _ = decode_state(layout, np.arange(len(model.rewards)))
+    return np.flatnonzero((layout.spawn_index[police] >= 0) & (layout.spawn_index[thief] >= 0))
+
+
+def key_of(layout, state):
+    police, thief, thief_dir = decode_state(layout, int(state))
+    return pack_state(layout, police, [thief], [thief_dir])
+
+
+def test_search_matches_value_iteration_steps():
+    # d backups of value iteration from V = 0 give the same Q-values as a depth-d search
+    env = HideAndSeekEnv()
+    model = TransitionModel.build()
+    depth, gamma = 3, 0.999
+    values = np.zeros(len(model.rewards))
+    for _ in range(depth):
+        q = model.backup(values, gamma)
+        values = q.max(axis=1)
+    # Without a transposition table: it reuses deeper values for shallower searches
+    planner = ZeroLeaves(env, depth=depth, gamma=gamma, cache_size=0)
+    for state in np.random.default_rng(0).choice(valid_states(env.layout, model), size=20).tolist():
+        assert np.allclose(planner.q_values(key_of(env.layout, state), depth), q[state], atol=1e-4)
+
+
+def test_planner_policy_is_near_optimal():
+    # Exact expected return of the depth-2 planner from reset, over the states its policy reaches,
+    # against the optimal policy of value iteration
+    env = HideAndSeekEnv()
+    model = TransitionModel.build()
+    planner = ExpectimaxPlanner(env, depth=2)
+    starts = initial_states()
+    q_opt, _ = model.value_iteration()
+    optimal_policy = q_opt.greedy(np.arange(len(model.rewards)))
+    # States the planner never reaches keep the optimal action; it does not change the values of
+    # the reached ones and keeps policy_evaluation from converging slowly on pointless moves
+    policy = optimal_policy.copy()
+    seen, stack = set(starts.tolist()), starts.tolist()
+    while stack:
+        state = stack.pop()
+        action = int(np.argmax(planner.q_values(key_of(env.layout, state), planner.depth)))
+        policy[state] = action
+        for next_state, p in zip(model.next_states[state, action].tolist(), model.probs[state, action].tolist()):
+            if p > 0 and next_state not in seen:
+                seen.add(next_state)
+                stack.append(next_state)
+    optimal = model.policy_evaluation(optimal_policy)[starts].mean()
+    achieved = model.policy_evaluation(policy)[starts].mean()
+    assert optimal - 0.5 <= achieved <= optimal + 1e-3
+
+
+def test_transposition_table_respects_depth():
+    env = HideAndSeekEnv(seed=0)
+    planner = ExpectimaxPlanner(env)
+    key = env.pack_state()
+
+    # An entry searched less deeply than requested is searched again and replaced
+    planner.cache[key] = (12345.0, 1)
+    misses = planner.misses
+    value = planner.value(key, 2)
+    assert value != 12345.0 and planner.misses > misses and planner.cache[key] == (value, 2)
+
+    # An entry searched at least as deeply is reused
+    hits = planner.hits
+    assert planner.value(key, 2) == value and planner.value(key, 1) == value
+    assert planner.hits == hits + 2
+    planner.cache[key] = (12345.0, 3)
+    assert planner.value(key, 2) == 12345.0
@@ -0,0 +1,34 @@
+import numpy as np
+from prioritized_replay import PrioritizedReplayBuffer, SumTree
+
+
+def test_sum_tree_total_and_find():
+    rng = np.random.default_rng(0)
+    tree = SumTree(13)
+    priorities = np.zeros(13)
+    for _ in range(50):
+        indices = rng.choice(13, size=4, replace=False)
+        priorities[indices] = rng.random(4)
+        tree.update(indices, priorities[indices])
+        assert np.isclose(tree.total(), priorities.sum())
+    # find() maps each value to the leaf whose slice of the cumulative sum contains it
+    bounds = np.cumsum(priorities)
+    values = rng.random(1000) * tree.total()
+    assert (tree.find(values) == np.searchsorted(bounds, values, side='right')).all()
+
+
+def test_stratified_sampling_follows_priorities():
+    buffer = PrioritizedReplayBuffer(64, (1,), alpha=1.0)
+    for t in range(65):
+        buffer.add([t % 256], 0, 0.0, False)
+    # The buffer is full and the newest row is row 0, so rows 1-63 share the total priority equally;
+    # one sample is drawn from each of 32 equal slices of it, in order
+    assert (buffer._next - 1) % buffer.capacity == 0
+    indices = buffer.sample_indices(32, rng=np.random.default_rng(0))
+    k = np.arange(32)
+    assert (indices >= k * 63 // 32 + 1).all() and (indices <= (k + 1) * 63 // 32 + 1).all()
+
+    # A transition with most of the priority is drawn from most slices
+    buffer.update_priorities(np.array([10]), np.array([1000.0]))
+    counts = np.bincount(buffer.sample_indices(32, rng=np.random.default_rng(1)), minlength=64)
+    assert counts[10] >= 30
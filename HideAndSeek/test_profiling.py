@@ -0,0 +1,38 @@
+import time
+from hide_and_seek import HideAndSeekEnv
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+def phases(env):
+    return {phase: s["calls"] for phase, s in env.stats().items()}
+
+
+def test_phase_breakdown():
+    env = HideAndSeekEnv(profile=True, seed=0)
+    env.profiler.reset()
+    start = time.perf_counter_ns()
+    env.reset()
+    elapsed = time.perf_counter_ns() - start
+    # A reset is charged to its own phases, including the render of its observation
+    assert phases(env) == {"reset;spawn": 1, "reset;observe": 1, "reset;observe;hiding": 1, "reset;observe;draw": 1}
+    assert sum(s["total_ns"] for s in env.stats().values()) <= elapsed
+
+    env.profiler.reset()
+    for action in (0, 2, 4):
+        env.step(action)
+    env.render('dqn')
+    counts = phases(env)
+    assert counts["step;police"] == 2 and counts["step;observe;hiding"] == 3 and counts["step;observe;draw"] == 3
+    assert counts["render;hiding"] == 1 and counts["render;draw"] == 1
+    assert not any(phase.startswith("reset") for phase in counts)
+    assert sum(counts[p] for p in counts if p.startswith("step;observe;")) == 6
+
+
+def test_vector_phase_breakdown():
+    env = VectorHideAndSeekEnv(4, profile=True, seed=0)
+    env.profiler.reset()
+    env.reset()
+    assert set(phases(env)) == {"reset;spawn", "reset;observe", "reset;observe;hiding", "reset;observe;draw"}
+    env.profiler.reset()
+    env.step([0, 1, 2, 4])
+    assert all(phase.startswith("step;") for phase in phases(env))
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from checkpoint import convert_tf_checkpoint
+from q_inference import CONV_LAYERS, FC_LAYERS, InferenceServer, QNetwork, read_checkpoint
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TF_CHECKPOINT = os.path.join(HERE, "model-1306635")
+
+
+def tiny_params(seed=0):
+    # Same layers as the notebook's q_network on (11, 19, 1) observations, with few channels
+    rng = np.random.default_rng(seed)
+    params, channels = {}, 1
+    for (name, k, _), out in zip(CONV_LAYERS, (2, 3, 2)):
+        params[name + "/weights"] = rng.standard_normal((k, k, channels, out)).astype(np.float32)
+        params[name + "/biases"] = rng.standard_normal(out).astype(np.float32)
+        channels = out
+    for name, (n_in, n_out) in zip(FC_LAYERS, [(2 * 3 * 2, 4), (4, 5)]):
+        params[name + "/weights"] = rng.standard_normal((n_in, n_out)).astype(np.float32)
+        params[name + "/biases"] = rng.standard_normal(n_out).astype(np.float32)
+    return params
+
+
+def naive_forward(params, obs):
+    # Direct loops over output pixels with TensorFlow's SAME padding
+    x = np.asarray(obs, dtype=np.float64)
+    for name, k, stride in CONV_LAYERS:
+        w, b = params[name + "/weights"], params[name + "/biases"]
+        batch, height, width, _ = x.shape
+        out_h, out_w = -(-height // stride), -(-width // stride)
+        top = max((out_h - 1) * stride + k - height, 0) // 2
+        left = max((out_w - 1) * stride + k - width, 0) // 2
+        out = np.zeros((batch, out_h, out_w, w.shape[3]))
+        for i in range(out_h):
+            for j in range(out_w):
+                for di in range(k):
+                    for dj in range(k):
+                        y, x_ = i * stride + di - top, j * stride + dj - left
+                        if 0 <= y < height and 0 <= x_ < width:
+                            out[:, i, j] += x[:, y, x_] @ w[di, dj]
+        x = np.maximum(out + b, 0)
+    x = x.reshape(len(x), -1)
+    x = np.maximum(x @ params["fully_connected/weights"] + params["fully_connected/biases"], 0)
+    return x @ params["fully_connected_1/weights"] + params["fully_connected_1/biases"]
+
+
+def test_forward_matches_naive_convolution():
+    params = tiny_params()
+    obs = np.random.default_rng(1).integers(0, 256, size=(3, 11, 19, 1))
+    expected = naive_forward(params, obs)
+    network = QNetwork(params)
+    assert np.allclose(network.forward(obs), expected, rtol=1e-4, atol=1e-2)
+    assert (network.act(obs) == expected.argmax(axis=1)).all()
+
+
+def test_checkpoint_round_trip(tmp_path):
+    network = QNetwork(tiny_params())
+    obs = np.random.default_rng(1).integers(0, 256, size=(4, 11, 19, 1))
+    network.save(str(tmp_path / "tiny"))
+    for mmap_mode in ('r', None):
+        loaded = QNetwork.load(str(tmp_path / "tiny"), mmap_mode=mmap_mode)
+        assert np.array_equal(loaded.forward(obs), network.forward(obs))
+
+
+@pytest.mark.skipif(not os.path.exists(TF_CHECKPOINT + ".index"), reason="no TensorFlow checkpoint")
+def test_read_tf_checkpoint(tmp_path):
+    arrays = read_checkpoint(TF_CHECKPOINT, "mainQ")
+    assert arrays["Conv/weights"].shape == (5, 5, 1, 32) and arrays["fully_connected_1/biases"].shape == (5,)
+    assert set(read_checkpoint(TF_CHECKPOINT)) >= {"mainQ/" + name for name in arrays}
+    # The converted checkpoint gives the same network
+    convert_tf_checkpoint(TF_CHECKPOINT, str(tmp_path / "converted"))
+    obs = np.random.default_rng(0).integers(0, 256, size=(4, 11, 19, 1))
+    expected = QNetwork(arrays).forward(obs)
+    assert np.allclose(naive_forward(arrays, obs), expected, rtol=1e-4, atol=1e-2)
+    assert np.array_equal(QNetwork.from_checkpoint(str(tmp_path / "converted")).forward(obs), expected)
+
+
+def test_inference_server():
+    network = QNetwork(tiny_params())
+    obs = np.random.default_rng(1).integers(0, 256, size=(200, 11, 19, 1))
+    with InferenceServer(network, max_batch=64) as server:
+        futures = [server.submit(o) for o in obs[:100]]
+        assert [f.result(timeout=10) for f in futures] == network.act(obs[:100]).tolist()
+        assert server.act_many(list(obs[100:])).tolist() == network.act(obs[100:]).tolist()
+        assert sum(server.batch_sizes) == 200 and max(server.batch_sizes) <= 64
+        percentiles = server.latency_percentiles((50, 90, 99))
+        assert list(percentiles) == [50, 90, 99]
+        assert 0 < percentiles[50] <= percentiles[90] <= percentiles[99]
+    with pytest.raises(RuntimeError):
+        server.submit(obs[0])
+
+
+def test_close_while_submitting():
+    # Every request accepted before close() is answered; later ones are refused
+    network = QNetwork(tiny_params())
+    obs = np.zeros((11, 19, 1))
+    server = InferenceServer(network)
+    accepted, refused = [], []
+
+    def client():
+        while True:
+            try:
+                accepted.append(server.submit(obs))
+            except RuntimeError:
+                refused.append(True)
+                return
+
+    threads = [threading.Thread(target=client) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while len(accepted) < 200:
+        time.sleep(0.001)
+    server.close()
+    for thread in threads:
+        thread.join()
+    assert len(refused) == 4
+    assert all(f.result(timeout=10) == network.act(obs[None])[0] for f in accepted)
@@ -0,0 +1,17 @@
+import numpy as np
+from metrics_log import MetricsWriter, read_metrics
+from q_table import QLearningTrainer
+
+
+def test_trainer_log_matches_episodes(tmp_path):
+    path = str(tmp_path / "metrics.bin")
+    trainer = QLearningTrainer(n_envs=64, seed=0)
+    with MetricsWriter(path) as metrics:
+        rewards, steps = trainer.train(500, metrics)
+    log = read_metrics(path)
+    assert len(log) == len(rewards) == 500
+    assert np.isfinite(log["loss"]).all()
+    # steps counts every action, including the final catch, like convert_text_log's "Epoch"
+    assert (log["steps"] == log["actions"].sum(axis=1)).all()
+    assert (log["steps"] == steps + 1).all()
+    assert (log["reward"] == rewards).all()
@@ -0,0 +1,28 @@
+import numpy as np
+from replay_buffer import ReplayBuffer
+
+
+def test_next_obs_is_the_next_row():
+    buffer = ReplayBuffer(8, (2,), n_envs=3)
+    for t in range(20):
+        obs = np.array([[t, env] for env in range(3)])
+        buffer.add(obs, t % 5, float(t), t % 7 == 0)
+    obs, actions, next_obs, rewards, dones = buffer.sample(1000, rng=np.random.default_rng(0))
+    assert (next_obs[:, 0] == obs[:, 0] + 1).all()
+    assert (next_obs[:, 1] == obs[:, 1]).all()
+    assert (actions == obs[:, 0] % 5).all()
+    assert (rewards == obs[:, 0]).all()
+    assert (dones == (obs[:, 0] % 7 == 0)).all()
+
+
+def test_newest_row_is_never_sampled():
+    rng = np.random.default_rng(0)
+    buffer = ReplayBuffer(5, (1,))
+    for t in range(12):
+        buffer.add([t], 0, 0.0, False)
+        if t == 0:
+            assert len(buffer) == 0
+            continue
+        sampled = buffer.sample(200, rng=rng)[0][:, 0]
+        # Only the rows still in the buffer, minus the newest one
+        assert set(sampled.tolist()) == set(range(max(t - 4, 0), t))
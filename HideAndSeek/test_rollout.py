@@ -0,0 +1,44 @@
+import numpy as np
+import hide_and_seek_1thief
+from rollout import RolloutWorkers
+
+
+def collect(seed, n_steps=60, **kwargs):
+    actions = np.random.default_rng(0).integers(5, size=(n_steps, 6))
+    with RolloutWorkers(n_workers=2, envs_per_worker=3, seed=seed, **kwargs) as workers:
+        trajectory = [workers.reset().copy()]
+        for a in actions:
+            obs, rewards, dones = workers.step(a)
+            trajectory.append((obs.copy(), rewards.copy(), dones.copy()))
+    return trajectory
+
+
+def test_same_seed_same_trajectories():
+    first, again, other = collect(0), collect(0), collect(1)
+    assert np.array_equal(first[0], again[0])
+    for a, b in zip(first[1:], again[1:]):
+        assert all(np.array_equal(x, y) for x, y in zip(a, b))
+    assert not np.array_equal(first[0], other[0])
+
+
+def test_shared_memory_shapes():
+    with RolloutWorkers(n_workers=2, envs_per_worker=3) as workers:
+        obs = workers.reset()
+        assert workers.num_envs == 6
+        assert obs.shape == (6, 11, 19, 1) and obs.dtype == workers.single_observation_space.dtype
+        assert workers.rewards.shape == workers.dones.shape == workers.actions.shape == (6,)
+    with RolloutWorkers(hide_and_seek_1thief.HideAndSeekEnv, n_workers=2, envs_per_worker=3) as workers:
+        obs, rewards, dones = workers.step(np.full(6, 4))
+        assert obs.shape == (6,) and obs.dtype == np.int64
+        assert ((obs >= 0) & (obs < workers.single_observation_space.n)).all()
+        assert set(rewards.tolist()) <= {-10.0, 100.0}
+
+
+def test_workers_shut_down():
+    workers = RolloutWorkers(n_workers=2, envs_per_worker=2)
+    workers.reset()
+    # Closing while a step is in flight waits for it first
+    workers.step_async(np.zeros(4))
+    workers.close()
+    assert all(not proc.is_alive() and proc.exitcode == 0 for proc in workers._procs)
+    workers.close()
@@ -0,0 +1,81 @@
+from collections import deque
+import numpy as np
+import pytest
+import thief_policies
+from hide_and_seek import HideAndSeekEnv
+from hide_and_seek_map import DEFAULT_MAP, compile_map, generate_maze
+from hide_and_seek_rules import CAUGHT, move_one
+from thief_policies import DistanceTable, EvasiveThief, ScriptedThief, move_distance
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+def bfs_distances(layout, source):
+    # Reference single-source BFS over layout.neighbours
+    n = len(layout.spawn_cells)
+    dist = np.full(n, n)
+    dist[layout.spawn_index[source]] = 0
+    queue = deque([source])
+    while queue:
+        cell = queue.popleft()
+        for nxt in layout.neighbours(cell).tolist():
+            if dist[layout.spawn_index[nxt]] == n:
+                dist[layout.spawn_index[nxt]] = dist[layout.spawn_index[cell]] + 1
+                queue.append(nxt)
+    return dist
+
+
+def test_distance_table_matches_bfs():
+    for map_rows in (DEFAULT_MAP, generate_maze(12, 9, seed=0), generate_maze(10, 10, seed=1, loops=0.2)):
+        layout = compile_map(map_rows)
+        table = DistanceTable(layout)
+        for source in layout.spawn_cell_list:
+            assert (table.distances[layout.spawn_index[source]] == bfs_distances(layout, source)).all()
+
+
+@pytest.mark.parametrize("max_cells", [thief_policies.MAX_TABLE_CELLS, 0])
+def test_evasive_thief_moves_away(monkeypatch, max_cells):
+    # With and without a DistanceTable (max_cells=0 falls back to the move distance)
+    monkeypatch.setattr(thief_policies, "MAX_TABLE_CELLS", max_cells)
+    layout = compile_map(generate_maze(8, 6, seed=0, loops=0.3))
+    cells = layout.spawn_cells
+    rng = np.random.default_rng(0)
+    police = rng.choice(cells, size=50)
+    thief_pos = np.broadcast_to(cells, (50, len(cells)))
+    directions = EvasiveThief(epsilon=0.0)(layout, police, thief_pos, np.zeros_like(thief_pos), rng)
+    assert directions.shape == thief_pos.shape
+
+    # Never a blocked direction, and no legal move ends farther from the police
+    assert ((layout.legal_moves[thief_pos] >> directions) & 1).all()
+    targets = layout.neighbours(thief_pos)
+    dist = move_distance(layout, police[:, None, None], targets)
+    legal = ((layout.legal_moves[thief_pos][..., None] >> np.arange(4)) & 1) == 1
+    best = np.where(legal, dist, -1).max(axis=-1)
+    assert (np.take_along_axis(dist, directions[..., None], axis=-1)[..., 0] == best).all()
+
+
+def test_evasive_thief_explores_legally():
+    layout = compile_map(DEFAULT_MAP)
+    thief_pos = np.broadcast_to(layout.spawn_cells, (20, len(layout.spawn_cells)))
+    directions = EvasiveThief(epsilon=1.0)(layout, thief_pos[:, 0], thief_pos, np.zeros_like(thief_pos),
+                                          np.random.default_rng(0))
+    assert ((layout.legal_moves[thief_pos] >> directions) & 1).all()
+    assert len(np.unique(directions)) == 4
+
+
+def test_scripted_thief_follows_script():
+    script = [0, 2, 2, 1, 3]
+    env = HideAndSeekEnv(n_thieves=3, thief_policy=ScriptedThief(script), seed=0)
+    env.reset()
+    vector = VectorHideAndSeekEnv(2, n_thieves=3, thief_policy=ScriptedThief(script), seed=0)
+    vector.reset()
+    for t in range(12):
+        pos, old = list(env.thief_pos), list(env.thief_dir)
+        vector_pos = vector.thief_pos.copy()
+        env.step(t % 4)
+        vector.step([t % 4, (t + 1) % 4])
+        d = script[t % len(script)]
+        # Thieves turn to the scripted direction and move unless a wall blocks it
+        assert env.thief_dir == [CAUGHT if o == CAUGHT else d for o in old]
+        assert env.thief_pos == [c if o == CAUGHT else move_one(env.layout, c, d) for c, o in zip(pos, old)]
+        assert (vector.thief_dir == d).all()
+        assert vector.thief_pos.tolist() == [[move_one(vector.layout, c, d) for c in row] for row in vector_pos.tolist()]
@@ -0,0 +1,41 @@
+import numpy as np
+from hide_and_seek_1thief import HideAndSeekEnv
+from hide_and_seek_rules import decode_state, encode_state, n_states
+from value_iteration import TransitionModel, initial_states
+
+
+def test_encode_decode_round_trip():
+    env = HideAndSeekEnv()
+    states = np.arange(n_states(env.layout))
+    assert (encode_state(env.layout, *decode_state(env.layout, states)) == states).all()
+    for state in range(0, len(states), 101):
+        assert env.encode(*env.decode(state)) == state
+
+
+def test_transition_model_matches_env():
+    model = TransitionModel.build()
+    totals = model.probs.sum(axis=-1)
+    assert np.allclose(totals[model.terminal], 0) and np.allclose(totals[~model.terminal], 1)
+
+    # Every step of the env from a state on empty cells is a transition of the model
+    env = HideAndSeekEnv(seed=0)
+    police, thief, _ = decode_state(env.layout, np.arange(len(model.rewards)))
+    valid = np.flatnonzero((env.layout.spawn_index[police] >= 0) & (env.layout.spawn_index[thief] >= 0))
+    rng = np.random.default_rng(0)
+    for state in rng.choice(valid, size=300).tolist():
+        for action in range(5):
+            env.state = state
+            next_state, reward, done, _ = env.step(action)
+            assert reward == model.rewards[state, action] and done == model.terminal[state, action]
+            if not done:
+                support = model.next_states[state, action][model.probs[state, action] > 0]
+                assert next_state in support.tolist()
+
+
+def test_value_iteration_values_its_greedy_policy():
+    model = TransitionModel.build()
+    q, iterations = model.value_iteration()
+    starts = initial_states()
+    values = model.policy_evaluation(q.greedy(np.arange(len(model.rewards))))
+    assert np.allclose(values[starts], q.values[starts].max(axis=1), atol=0.1)
+    assert values[starts].mean() > 80
@@ -0,0 +1,38 @@
+import numpy as np
+from hide_and_seek import HideAndSeekEnv
+from hide_and_seek_1thief import HideAndSeekEnv as HideAndSeekEnv1
+from vector_hide_and_seek import VectorHideAndSeekEnv
+
+
+def run_lockstep(scalar, vector, seed, max_steps=3000):
+    # Both envs draw the same random numbers for one game, so with the same seed and actions they
+    # play the same first episode; returns its length
+    actions = np.random.default_rng(seed).integers(5, size=max_steps).tolist()
+    obs = scalar.reset(seed=seed)
+    vector_obs = vector.reset(seed=seed)
+    assert np.array_equal(vector_obs[0], obs)
+    for t, action in enumerate(actions):
+        obs, reward, done, _ = scalar.step(action)
+        vector_obs, rewards, dones, info = vector.step([action])
+        assert rewards[0] == reward and dones[0] == done
+        assert np.array_equal(info["final_observation"][0] if done else vector_obs[0], obs)
+        if done:
+            assert info["episode_steps"][0] == scalar.steps
+            return t + 1
+        assert vector.police[0] == scalar.police
+        assert vector.thief_pos[0].tolist() == scalar.thief_pos and vector.thief_dir[0].tolist() == scalar.thief_dir
+    return max_steps
+
+
+def test_vector_env_matches_scalar_env():
+    for n_thieves in (1, 3):
+        for policy in ("random", "hiding"):
+            scalar = HideAndSeekEnv(n_thieves=n_thieves, thief_policy=policy)
+            vector = VectorHideAndSeekEnv(1, n_thieves=n_thieves, obs_type='dqn', thief_policy=policy)
+            lengths = [run_lockstep(scalar, vector, seed) for seed in range(5)]
+            assert max(lengths) < 3000
+
+
+def test_discrete_observations_match_1thief_env():
+    lengths = [run_lockstep(HideAndSeekEnv1(), VectorHideAndSeekEnv(1, n_thieves=1), seed) for seed in range(10)]
+    assert max(lengths) < 3000
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+import numpy as np
+from hide_and_seek_rules import random_walk, random_walk_one, thief_sees_police
+
+
+# A thief policy is called once per step for all thieves of one game (police: cell, thieves:
+# arrays of shape (n_thieves,)) or of a batch of games (police: (N,), thieves: (N, n_thieves)):
+#
+#     directions = policy(layout, police, thief_pos, thief_dir, rng)
+#
+# It returns the direction each thief moves in (0: east, 1: west, 2: south, 3: north). A thief
+# that picks a direction blocked by a wall turns to face it without moving. The env only applies
+# the moves of thieves that are not caught.
+#
+# A policy may also have a method one(layout, police, thief_pos, thief_dir, rng) for a single game
+# given as Python lists, returning a list; HideAndSeekEnv uses it instead of __call__ when present.
+
+
+class RandomThief:
+    # Uniform random walk over the directions that are not blocked (the original behaviour)
+    def __call__(self, layout, police, thief_pos, thief_dir, rng):
+        return random_walk(layout, thief_pos, rng.random(np.shape(thief_pos)))[1]
+
+    def one(self, layout, police, thief_pos, thief_dir, rng):
+        # Same random numbers and directions as __call__
+        return [random_walk_one(layout, cell, u)[1] for cell, u in zip(thief_pos, rng.random(len(thief_pos)).tolist())]
+
+
+class ScriptedThief:
+    def __init__(self, script):
+        # Every thief follows the same list of directions, one per step, repeated when it runs out
+        self.script = np.asarray(script, dtype=np.int64)
+        self._next = 0
+
+    def __call__(self, layout, police, thief_pos, thief_dir, rng):
+        d = self.script[self._next % len(self.script)]
+        self._next += 1
+        return np.full(np.shape(thief_pos), d, dtype=np.int64)
+
+
+class EvasiveThief:
+    def __init__(self, epsilon=0.1):
+        # Move to the neighbouring cell farthest from the police (shortest-path distance over the
+        # map graph, or the move distance on maps too large for a DistanceTable; ties broken at
+        # random); with probability epsilon make a random move instead
+        self.epsilon = epsilon
+
+    def __call__(self, layout, police, thief_pos, thief_dir, rng):
+        police = np.asarray(police)[..., None]
+        # Distance from the police to the cell each direction leads to; blocked directions lose
+        targets = layout.neighbours(thief_pos)
+        dist = move_distance(layout, police[..., None], targets).astype(np.float64)
+        legal = ((layout.legal_moves[thief_pos][..., None] >> np.arange(4)) & 1) == 1
+        score = np.where(legal, dist + rng.random(dist.shape), -1.0)
+        directions = np.argmax(score, axis=-1)
+        explore = rng.random(np.shape(thief_pos)) < self.epsilon
+        return np.where(explore, random_walk(layout, thief_pos, rng.random(np.shape(thief_pos)))[1], directions)
+
+
+class HidingThief:
+    def __init__(self, epsilon=0.25):
+        # Turn or move so that the thief is looking at the police, which makes every thief of the
+        # game uncatchable; otherwise (or with probability epsilon) make a random move
+        self.epsilon = epsilon
+
+    def __call__(self, layout, police, thief_pos, thief_dir, rng):
+        shape = np.shape(thief_pos)
+        # Whether the thief sees the police after moving (or turning) in each direction
+        directions = np.broadcast_to(np.arange(4), shape + (4,))
+        targets = layout.neighbours(thief_pos)
+        sees = thief_sees_police(layout, np.asarray(police)[..., None], targets, directions)
+        hide = np.argmax(np.where(sees, rng.random(sees.shape), -1.0), axis=-1)
+        walk = random_walk(layout, thief_pos, rng.random(shape))[1]
+        explore = rng.random(shape) < self.epsilon
+        return np.where(sees.any(axis=-1) & ~explore, hide, walk)
+
+
+class DistanceTable:
+    def __init__(self, layout):
+        # All-pairs shortest-path lengths (in moves) between the cells thieves and the police can
+        # stand on. index maps a cell to its row / column in distances (-1 for walls); cells that
+        # cannot reach each other get the distance len(cells).
+        cells = layout.spawn_cells
+        n = len(cells)
+        self.index = layout.spawn_index
+        neighbours = self.index[layout.neighbours(cells)].astype(np.int64)
+
+        # Breadth-first search from every cell at once over the 4-neighbour graph. The frontier
+        # holds the (source, cell) pairs reached at distance d as flat indices source * n + cell,
+        # so every pair is expanded once and the whole search costs O(n^2) rather than
+        # O(n^2 * diameter). A pair reached from several frontier cells is kept once: each writes
+        # its position into `first`, and only the last writer survives.
+        self.distances = np.full((n, n), n, dtype=np.int32 if n > 32767 else np.int16)
+        flat = self.distances.reshape(-1)
+        first = np.zeros(n * n, dtype=np.int32 if n * n * 4 < 2 ** 31 else np.int64)
+        frontier = np.arange(n, dtype=np.int64) * (n + 1)
+        flat[frontier] = 0
+        d = 0
+        while len(frontier):
+            d += 1
+            cell = frontier % n
+            reached = ((frontier - cell)[:, None] + neighbours[cell]).ravel()
+            reached = reached[flat[reached] == n]
+            order = np.arange(len(reached), dtype=first.dtype)
+            first[reached] = order
+            frontier = reached[first[reached] == order]
+            flat[frontier] = d
+
+
+# Tables kept by distance_table, least recently used first (see MAX_CACHED_MAPS)
+MAX_CACHED_TABLES = 8
+_tables = OrderedDict()
+
+# The table takes n^2 entries for n cells and about as many steps to build, so larger maps (e.g.
+# from generate_maze) go without one. The limit keeps the build near a second: 2719 cells (a 60 x 60
+# maze) took 0.9 s, 3129 cells 1.2 s and 4375 cells 2.4 s on one core.
+MAX_TABLE_CELLS = 3000
+
+
+def distance_table(layout):
+    # Built on first use and shared by all policies and envs that use the layout; None if the
+    # layout has more than MAX_TABLE_CELLS cells
+    if len(layout.spawn_cells) > MAX_TABLE_CELLS:
+        return None
+    table = _tables.get(layout.rows)
+    if table is None:
+        table = _tables[layout.rows] = DistanceTable(layout)
+        if len(_tables) > MAX_CACHED_TABLES:
+            _tables.popitem(last=False)
+    _tables.move_to_end(layout.rows)
+    return table
+
+
+def move_distance(layout, a, b):
+    # Shortest-path distance in moves between cells a and b (broadcast); on maps without a
+    # DistanceTable the number of moves without walls, |dx| / 2 + |dy|, is used instead
+    table = distance_table(layout)
+    if table is not None:
+        return table.distances[table.index[a], table.index[b]]
+    a_x, a_y = layout.position(a)
+    b_x, b_y = layout.position(b)
+    return np.abs(a_x - b_x) // 2 + np.abs(a_y - b_y)
+
+
+POLICIES = {"random": RandomThief, "evasive": EvasiveThief, "hiding": HidingThief}
+
+
+def make_thief_policy(policy):
+    # None, a name from POLICIES or a callable
+    if policy is None:
+        return RandomThief()
+    if isinstance(policy, str):
+        if policy not in POLICIES:
+            raise ValueError("unknown thief policy: {0}".format(policy))
+        return POLICIES[policy]()
+    return policy
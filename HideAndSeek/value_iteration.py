@@ -0,0 +1,146 @@
+import os
+import numpy as np
+from hide_and_seek_map import DEFAULT_MAP, NTH_BIT, POPCOUNT, compile_map
+from hide_and_seek_rules import decode_state, encode_state, in_catch_range, n_states, thief_sees_police
+from q_table import QTable
+
+
+# States are hide_and_seek_rules.encode_state indices (as in hide_and_seek_1thief.py); there are
+# n_states(layout) of them
+N_ACTIONS = 5
+
+
+class TransitionModel:
+    def __init__(self, next_states, probs, rewards, terminal):
+        # P[s, a] -> up to 4 (s', p) pairs (one per thief move) and the reward r(s, a);
+        # terminal[s, a] is True when action a catches the thief in state s
+        self.next_states = next_states
+        self.probs = probs
+        self.rewards = rewards
+        self.terminal = terminal
+
+    @classmethod
+    def build(cls, map_rows=DEFAULT_MAP):
+        # Enumerate every (state, action) of the 1-thief env at once
+        layout = compile_map(map_rows)
+        states = n_states(layout)
+        police, thief, thief_dir = decode_state(layout, np.arange(states))
+
+        # Thief moves uniformly among its legal directions (RandomThief); a thief with none stays put
+        masks = layout.legal_moves[thief]
+        count = POPCOUNT[masks]
+        k = np.arange(4)
+        move_dir = NTH_BIT[masks[:, None], k]
+        move_prob = np.where(k < count[:, None], 1.0 / np.maximum(count, 1)[:, None], 0.0)
+        move_prob[count == 0, 0] = 1.0
+        next_thief = np.where(count[:, None] > 0, layout.move(thief[:, None], move_dir), thief[:, None])
+        next_dir = np.where(count[:, None] > 0, move_dir, thief_dir[:, None])
+
+        next_states = np.zeros((states, N_ACTIONS, 4), dtype=np.int32)
+        probs = np.zeros((states, N_ACTIONS, 4), dtype=np.float32)
+        rewards = np.full((states, N_ACTIONS), -1.0, dtype=np.float32)
+        terminal = np.zeros((states, N_ACTIONS), dtype=bool)
+        for a in range(4):
+            legal = ((layout.legal_moves[police] >> a) & 1) == 1
+            next_police = layout.move(police, a)
+            rewards[~legal, a] = -10
+            next_states[:, a] = encode_state(layout, next_police[:, None], next_thief, next_dir)
+            probs[:, a] = move_prob
+
+        # Catch: same rules as the env, the episode ends on success
+        caught = (in_catch_range(layout, police, thief[:, None])[:, 0]
+                  & ~thief_sees_police(layout, police, thief[:, None], thief_dir[:, None])[:, 0])
+        rewards[:, 4] = np.where(caught, 100, -10)
+        terminal[:, 4] = caught
+        next_states[:, 4] = encode_state(layout, police[:, None], next_thief, next_dir)
+        probs[:, 4] = np.where(caught[:, None], 0.0, move_prob)
+        return cls(next_states, probs, rewards, terminal)
+
+    @classmethod
+    def load_or_build(cls, path, map_rows=DEFAULT_MAP):
+        # Cache the model on disk; it is rebuilt if the file was made for another map
+        if os.path.exists(path):
+            data = np.load(path)
+            if tuple(data["map"]) == tuple(map_rows):
+                return cls(data["next_states"], data["probs"], data["rewards"], data["terminal"])
+        model = cls.build(map_rows)
+        model.save(path, map_rows)
+        return model
+
+    def save(self, path, map_rows=DEFAULT_MAP):
+        np.savez_compressed(path, next_states=self.next_states, probs=self.probs, rewards=self.rewards,
+                            terminal=self.terminal, map=np.array(map_rows))
+
+    def backup(self, values, gamma):
+        # Q(s, a) = r(s, a) + gamma * sum_s' p(s' | s, a) V(s')
+        return self.rewards + gamma * (self.probs * values[self.next_states]).sum(axis=-1)
+
+    def value_iteration(self, gamma=0.999, tol=1e-4, max_iterations=100000):
+        values = np.zeros(len(self.rewards), dtype=np.float64)
+        for iteration in range(max_iterations):
+            q = self.backup(values, gamma)
+            new_values = q.max(axis=1)
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta < tol:
+                break
+        return QTable(len(self.rewards), N_ACTIONS, values=q.astype(np.float32)), iteration + 1
+
+    def policy_evaluation(self, policy, gamma=0.999, tol=1e-4, max_iterations=100000):
+        # Value of a deterministic policy (one action per state), e.g. QTable.greedy(all states)
+        rows = np.arange(len(self.rewards))
+        next_states, probs, rewards = self.next_states[rows, policy], self.probs[rows, policy], self.rewards[rows, policy]
+        values = np.zeros(len(self.rewards), dtype=np.float64)
+        for _ in range(max_iterations):
+            new_values = rewards + gamma * (probs * values[next_states]).sum(axis=-1)
+            delta = np.abs(new_values - values).max()
+            values = new_values
+            if delta < tol:
+                break
+        return values
+
+    def policy_iteration(self, gamma=0.999, tol=1e-4, max_iterations=100):
+        policy = np.zeros(len(self.rewards), dtype=np.int64)
+        for iteration in range(max_iterations):
+            values = self.policy_evaluation(policy, gamma, tol)
+            q = self.backup(values, gamma)
+            new_policy = q.argmax(axis=1)
+            # Keep the current action on ties so the loop terminates
+            stable = q[np.arange(len(q)), policy] >= q.max(axis=1) - tol
+            new_policy[stable] = policy[stable]
+            if (new_policy == policy).all():
+                break
+            policy = new_policy
+        return QTable(len(self.rewards), N_ACTIONS, values=q.astype(np.float32)), iteration + 1
+
+
+def initial_states(map_rows=DEFAULT_MAP):
+    # States HideAndSeekEnv.reset can return (police at (1, 1)), all equally likely
+    layout = compile_map(map_rows)
+    police = layout.cell(1, 1)
+    thief = np.repeat(layout.spawn_cells, 4)
+    thief_dir = np.tile(np.arange(4), len(layout.spawn_cells))
+    return encode_state(layout, np.full(len(thief), police), thief, thief_dir)
+
+
+# Solve the 1-thief game and compare the optimal policy with a trained Q-table
+if __name__ == "__main__":
+    import sys
+    import time
+
+    start = time.perf_counter()
+    model = TransitionModel.load_or_build("hide_and_seek_1thief_model.npz")
+    print("model: {0:.2f}s".format(time.perf_counter() - start))
+
+    start = time.perf_counter()
+    q_opt, iterations = model.value_iteration()
+    print("value iteration: {0} iterations, {1:.2f}s".format(iterations, time.perf_counter() - start))
+
+    starts = initial_states()
+    all_states = np.arange(len(model.rewards))
+    optimal = model.policy_evaluation(q_opt.greedy(all_states))
+    print("optimal expected return from reset: {0:.2f}".format(optimal[starts].mean()))
+    for path in sys.argv[1:]:
+        q = QTable.load(path, mmap_mode='r')
+        values = model.policy_evaluation(q.greedy(all_states))
+        print("{0}: expected return from reset {1:.2f}".format(path, values[starts].mean()))
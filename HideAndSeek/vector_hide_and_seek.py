@@ -0,0 +1,233 @@
+from gym import spaces
+import numpy as np
+from typing import Optional
+from hide_and_seek_map import DEFAULT_MAP, compile_map
+from hide_and_seek_render import pad_for_view
+from hide_and_seek_rules import CAUGHT, catch, encode_state, n_states, thief_sees_police
+from profiling import StepProfiler
+from thief_policies import make_thief_policy
+
+
+class VectorHideAndSeekEnv:
+    def __init__(self, num_envs, n_thieves=3, map=DEFAULT_MAP, obs_type=None, seed=None, profile=False,
+                 thief_policy=None, max_steps=None, view=None):
+        self.num_envs = num_envs
+        self.n_thieves = n_thieves
+
+        # Games still running after max_steps steps are ended (and reset) like finished ones
+        self.max_steps = max_steps
+
+        # Map and Grid size
+        self.map = list(map)
+        self.grid_size = (len(self.map), len(self.map[0]))
+        self.layout = compile_map(self.map)
+
+        # 'discrete' matches hide_and_seek_1thief.py (encoded state), 'dqn' matches render('dqn');
+        # with view=(h, w) 'dqn' observations are the h x w window centred on the police
+        if obs_type is None:
+            obs_type = "discrete" if n_thieves == 1 else "dqn"
+        if obs_type == "discrete" and n_thieves != 1:
+            raise ValueError("'discrete' observations are only defined for a single thief")
+        self.obs_type = obs_type
+        self.view = tuple(view) if view is not None else None
+        if self.view is not None:
+            # windows[y, x] is the (h, w) window centred on cell (x, y), a view of the padded map
+            padded = pad_for_view(self.layout.grid[..., None], self.view, 0)[..., 0]
+            self._windows = np.lib.stride_tricks.sliding_window_view(padded, self.view)
+
+        # Action space: move east, move west, move south, move north, catch
+        self.single_action_space = spaces.Discrete(5)
+        self.action_space = spaces.MultiDiscrete([5] * num_envs)
+        if obs_type == "discrete":
+            self.single_observation_space = spaces.Discrete(n_states(self.layout))
+        else:
+            self.single_observation_space = spaces.Box(low=0, high=255, shape=(self.view or self.grid_size) + (1,), dtype=np.uint8)
+
+        # Struct-of-arrays state: one row per game
+        self.police = np.zeros(num_envs, dtype=np.int64)
+        self.thief_pos = np.zeros((num_envs, n_thieves), dtype=np.int64)
+        self.thief_dir = np.zeros((num_envs, n_thieves), dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+
+        self.np_random = np.random.default_rng(seed)
+
+        # Thief behaviour (see thief_policies.py), called once per step for the thieves of all games
+        self.thief_policy = make_thief_policy(thief_policy)
+
+        # Per-phase nanosecond counters of step() and render(), as in HideAndSeekEnv
+        self.profiler = StepProfiler() if profile else None
+        self._profile_stack = None
+
+        self.reset()
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[dict] = None
+    ):
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+            self._profile_stack = "reset;observe"
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        if prof is not None:
+            prof.lap("reset;spawn")
+        obs = self._observe()
+        if prof is not None:
+            prof.lap("reset;observe")
+        self._profile_stack = None
+        return obs
+
+    def _reset_envs(self, mask):
+        n = int(mask.sum())
+        if n == 0:
+            return
+        # Initial police position at (1, 1), thieves anywhere on an empty space facing a random direction
+        self.police[mask] = self.grid_size[1] + 1
+        spawn_cells = self.layout.spawn_cells
+        self.thief_pos[mask] = spawn_cells[self.np_random.integers(len(spawn_cells), size=(n, self.n_thieves))]
+        self.thief_dir[mask] = self.np_random.integers(4, size=(n, self.n_thieves))
+        self.steps[mask] = 0
+
+    def _hiding(self, rows=slice(None)):
+        # Vectorized is_thief_hiding: True for a game if any free thief is looking at the police
+        return thief_sees_police(self.layout, self.police[rows], self.thief_pos[rows], self.thief_dir[rows]).any(axis=1)
+
+    def step(self, actions):
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+        # Reward: time penalty
+        rewards = np.full(self.num_envs, -1, dtype=np.int64)
+
+        # Police action
+        move = actions < 4
+        legal = ((self.layout.legal_moves[self.police] >> actions) & 1) == 1
+        self.police = self.layout.move(self.police, actions)
+        rewards[move & ~legal] = -10
+        if prof is not None:
+            prof.lap("step;police")
+
+        # Catch action
+        catching = actions == 4
+        caught, catch_rewards = catch(self.layout, self.police, self.thief_pos, self.thief_dir)
+        caught &= catching[:, None]
+        rewards[catching] = catch_rewards[catching]
+        self.thief_dir[caught] = CAUGHT
+        free = self.thief_dir != CAUGHT
+        dones = ~free.any(axis=1)
+        if prof is not None:
+            prof.lap("step;catch")
+
+        # Thief action (thief policy)
+        walk = free & ~dones[:, None]
+        thief_dir = self.thief_policy(self.layout, self.police, self.thief_pos, self.thief_dir, self.np_random)
+        thief_pos = self.layout.move(self.thief_pos, thief_dir)
+        self.thief_pos = np.where(walk, thief_pos, self.thief_pos)
+        self.thief_dir = np.where(walk, thief_dir, self.thief_dir)
+
+        self.steps += ~dones
+        if self.max_steps is not None:
+            truncated = ~dones & (self.steps >= self.max_steps)
+            dones |= truncated
+        if prof is not None:
+            prof.lap("step;thieves")
+
+        # Auto-reset finished games; their last observation, length, number of caught thieves and
+        # whether they hit max_steps are kept in info (one entry per finished game)
+        info = {}
+        if dones.any():
+            self._profile_stack = "step;reset"
+            finished = np.flatnonzero(dones)
+            info["final_observation"] = self._observe(finished)
+            info["episode_steps"] = self.steps[finished]
+            info["episode_caught"] = (self.thief_dir[finished] == CAUGHT).sum(axis=1)
+            info["truncated"] = truncated[finished] if self.max_steps is not None else np.zeros(len(finished), dtype=bool)
+            self._reset_envs(dones)
+            if prof is not None:
+                prof.lap("step;reset")
+
+        self._profile_stack = "step;observe"
+        obs = self._observe()
+        if prof is not None:
+            prof.lap("step;observe")
+        self._profile_stack = None
+        return obs, rewards, dones, info
+
+    def stats(self):
+        # Per-phase calls and nanoseconds (profile=True only), see profiling.StepProfiler
+        return self.profiler.stats() if self.profiler is not None else {}
+
+    def encode(self, rows=slice(None)):
+        # Same states as HideAndSeekEnv.encode of hide_and_seek_1thief.py
+        return encode_state(self.layout, self.police[rows], self.thief_pos[rows, 0], self.thief_dir[rows, 0])
+
+    def render(self, mode='dqn', rows=slice(None)):
+        # Same characters as HideAndSeekEnv.render: 'P' for the police, the direction for a visible
+        # thief, direction + 5 for a hiding thief (caught thieves are not drawn while hiding)
+        prof = self.profiler
+        if prof is not None:
+            stack = self._profile_stack or "render"
+            if self._profile_stack is None:
+                prof.start()
+        hiding = self._hiding(rows)
+        if prof is not None:
+            prof.lap(stack + ";hiding")
+
+        police = self.police[rows]
+        n = len(police)
+        index = np.arange(n)
+        thief_pos, thief_dir = self.thief_pos[rows], self.thief_dir[rows]
+        if self.view is None:
+            shape = self.grid_size
+            grid = np.empty((n, self.layout.grid.size), dtype=np.uint8)
+            grid[:] = self.layout.grid.reshape(1, -1)
+            inside = np.ones(thief_pos.shape, dtype=bool)
+        else:
+            # Windows of the padded map centred on each police; thief cells are moved to window
+            # coordinates and those outside the window are not drawn
+            shape = h, w = self.view
+            x, y = self.layout.position(police)
+            grid = self._windows[y, x].reshape(n, h * w)
+            thief_x, thief_y = self.layout.position(thief_pos)
+            row, column = thief_y - y[:, None] + h // 2, thief_x - x[:, None] + w // 2
+            inside = (row >= 0) & (row < h) & (column >= 0) & (column < w)
+            police = np.full(n, h // 2 * w + w // 2)
+            thief_pos = row * w + column
+        grid[index, police] = ord("P")
+        for t in range(self.n_thieves):
+            pos, d = thief_pos[:, t], thief_dir[:, t]
+            code = np.where(hiding, d + ord("5"), d + ord("0"))
+            draw = (~hiding | (d != CAUGHT)) & inside[:, t]
+            grid[index[draw], pos[draw]] = code[draw]
+        if prof is not None:
+            prof.lap(stack + ";draw")
+        return grid.reshape((n,) + shape + (1,))
+
+    def _observe(self, rows=slice(None)):
+        if self.obs_type == "discrete":
+            return self.encode(rows)
+        return self.render('dqn', rows)
+
+
+# Measure the batched step throughput
+if __name__ == "__main__":
+    import time
+
+    env = VectorHideAndSeekEnv(4096)
+    env.reset(seed=0)
+
+    n_steps = 200
+    start = time.perf_counter()
+    episodes = 0
+    for _ in range(n_steps):
+        actions = env.np_random.integers(5, size=env.num_envs)
+        obs, rewards, dones, info = env.step(actions)
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    print("{0} env steps/sec, {1} finished episodes".format(int(n_steps * env.num_envs / elapsed), episodes))
@@ -0,0 +1,237 @@
+import gym
+from gym import spaces
+import numpy as np
+
+
+# Observation preprocessing stages that can be stacked over any gym env, e.g. for Pong-v4
+#
+#     env = FrameStack(Grayscale(Downsample(Crop(gym.make("Pong-v4"), rows=slice(35, 195)), 2),
+#                                erase=(210, 164, 74)), 4)
+#
+# or FrameStack(HideAndSeekEnv(obs_buffers=2), 4). Every stage keeps the reset/step API of the env
+# it wraps (obs or (obs, info) from reset, 4- or 5-tuples from step). Observations stay uint8;
+# normalization is left to to_float() on the sampled batch, so the replay buffer stores bytes.
+
+
+class ObservationStage(gym.Wrapper):
+    # Base class: subclasses set observation_space and implement observation(obs); reset_stage(obs)
+    # is called with the first observation of an episode (before observation())
+    def reset(self, **kwargs):
+        result = self.env.reset(**kwargs)
+        if isinstance(result, tuple):
+            obs, info = result
+            self.reset_stage(obs)
+            return self.observation(obs), info
+        self.reset_stage(result)
+        return self.observation(result)
+
+    def step(self, action):
+        result = self.env.step(action)
+        return (self.observation(result[0]),) + tuple(result[1:])
+
+    def reset_stage(self, obs):
+        pass
+
+    def observation(self, obs):
+        raise NotImplementedError
+
+
+def _box(space, obs):
+    # Box with the bounds of `space` (scalars) and the shape and dtype of obs
+    low = np.min(space.low) if isinstance(space, spaces.Box) else 0
+    high = np.max(space.high) if isinstance(space, spaces.Box) else 255
+    return spaces.Box(low=low, high=high, shape=obs.shape, dtype=obs.dtype)
+
+
+class Crop(ObservationStage):
+    def __init__(self, env, rows=None, cols=None):
+        # Keep obs[rows, cols] (slices); returns a view of the wrapped env's observation
+        super(Crop, self).__init__(env)
+        self.index = (rows or slice(None), cols or slice(None))
+        self.observation_space = _box(env.observation_space, np.zeros(env.observation_space.shape, env.observation_space.dtype)[self.index])
+
+    def observation(self, obs):
+        return obs[self.index]
+
+
+class Downsample(ObservationStage):
+    def __init__(self, env, factor=2):
+        # Keep every factor-th row and column (factor: int or (rows, cols)), like obs[::2, ::2];
+        # returns a view
+        super(Downsample, self).__init__(env)
+        fy, fx = (factor, factor) if np.isscalar(factor) else factor
+        self.index = (slice(None, None, fy), slice(None, None, fx))
+        self.observation_space = _box(env.observation_space, np.zeros(env.observation_space.shape, env.observation_space.dtype)[self.index])
+
+    def observation(self, obs):
+        return obs[self.index]
+
+
+class Grayscale(ObservationStage):
+    def __init__(self, env, erase=None):
+        # (H, W, 3) colour frames -> (H, W, 1) uint8 channel mean. Pixels whose mean equals the mean
+        # of the colour `erase` are set to 0 (the contrast step of the Pong notebook). The result is
+        # written into one reused array, so it is only valid until the next step.
+        super(Grayscale, self).__init__(env)
+        height, width = env.observation_space.shape[:2]
+        self.erase = None if erase is None else int(sum(erase))
+        self._sum = np.zeros((height, width), dtype=np.uint16)
+        self._out = np.zeros((height, width, 1), dtype=np.uint8)
+        self.observation_space = spaces.Box(low=0, high=255, shape=self._out.shape, dtype=np.uint8)
+
+    def observation(self, obs):
+        np.add(obs[..., 0], obs[..., 1], out=self._sum, dtype=np.uint16)
+        self._sum += obs[..., 2]
+        out = self._out[..., 0]
+        np.floor_divide(self._sum, 3, out=out, casting='unsafe')
+        if self.erase is not None:
+            out[self._sum == self.erase] = 0
+        return self._out
+
+
+class ToUint8(ObservationStage):
+    def __init__(self, env, scale=1.0, offset=0.0):
+        # obs * scale + offset, clipped to [0, 255] and stored as uint8 in a reused array; with the
+        # defaults integer observations (e.g. ord() codes) are only narrowed
+        super(ToUint8, self).__init__(env)
+        self.scale = scale
+        self.offset = offset
+        self._out = np.zeros(env.observation_space.shape, dtype=np.uint8)
+        self.observation_space = spaces.Box(low=0, high=255, shape=self._out.shape, dtype=np.uint8)
+
+    def observation(self, obs):
+        if self.scale != 1.0 or self.offset != 0.0:
+            obs = np.asarray(obs, dtype=np.float32) * self.scale + self.offset
+        np.clip(obs, 0, 255, out=self._out, casting='unsafe')
+        return self._out
+
+
+class FrameStack(ObservationStage):
+    def __init__(self, env, k=4, keep=1):
+        # Observation = the last k frames concatenated along the last (channel) axis, oldest first;
+        # an episode starts with k copies of its first frame. The frames are written once into a
+        # sliding buffer and a stack is a view of k consecutive frames of it (single-channel frames;
+        # with more channels the stack is reshaped, which copies). When the buffer is full the last
+        # k - 1 frames move to its start, once every k + keep steps. A returned stack stays valid
+        # for `keep` more steps (1: obs can still be stored after env.step returned next_obs, as the
+        # training loops do).
+        super(FrameStack, self).__init__(env)
+        self.k = k
+        space = env.observation_space
+        self.n_frames = 2 * k - 1 + keep
+        self._frames = np.zeros((self.n_frames,) + space.shape, dtype=space.dtype)
+        self._next = k
+        self.observation_space = spaces.Box(low=np.min(space.low), high=np.max(space.high),
+                                            shape=space.shape[:-1] + (k * space.shape[-1],), dtype=space.dtype)
+
+    def reset_stage(self, obs):
+        self._frames[:self.k - 1] = obs
+        self._next = self.k - 1
+
+    def observation(self, obs):
+        k = self.k
+        if self._next == self.n_frames:
+            self._frames[:k - 1] = self._frames[self.n_frames - k + 1:]
+            self._next = k - 1
+        self._frames[self._next] = obs
+        self._next += 1
+        stack = np.moveaxis(self._frames[self._next - k:self._next], 0, -2)
+        return stack.reshape(self.observation_space.shape)
+
+
+def to_float(batch, scale=1 / 255, offset=0.0):
+    # Normalize a batch of uint8 observations for the network: float32 batch * scale + offset
+    out = np.multiply(batch, np.float32(scale), dtype=np.float32)
+    if offset:
+        out += np.float32(offset)
+    return out
+
+
+class SyntheticFrames(gym.Env):
+    def __init__(self, shape=(210, 160, 3), episode_length=1000, seed=None):
+        # Stand-in for an Atari env (reset -> obs, step -> (obs, reward, done, info)) that draws a
+        # ball and two paddles on a coloured field, for testing preprocessing without the ROM
+        super(SyntheticFrames, self).__init__()
+        self.shape = shape
+        self.episode_length = episode_length
+        self.action_space = spaces.Discrete(6)
+        self.observation_space = spaces.Box(low=0, high=255, shape=shape, dtype=np.uint8)
+        self.np_random = np.random.default_rng(seed)
+        self.background = np.array([144, 72, 17], dtype=np.uint8)
+        self.field = np.array([210, 164, 74], dtype=np.uint8)
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        self.t = 0
+        self.ball = self.np_random.integers([40, 10], [190, 150])
+        self.velocity = self.np_random.choice([-2, 2], size=2)
+        return self._frame()
+
+    def step(self, action):
+        self.t += 1
+        self.ball += self.velocity
+        for axis, (lo, hi) in enumerate([(35, 193), (0, self.shape[1] - 2)]):
+            if not lo <= self.ball[axis] <= hi:
+                self.velocity[axis] *= -1
+                self.ball[axis] = np.clip(self.ball[axis], lo, hi)
+        reward = float(self.np_random.random() < 0.01) - float(self.np_random.random() < 0.01)
+        return self._frame(), reward, self.t >= self.episode_length, {}
+
+    def _frame(self):
+        frame = np.empty(self.shape, dtype=np.uint8)
+        frame[:] = self.background
+        frame[35:195] = self.field
+        y, x = self.ball
+        frame[y:y + 4, x:x + 2] = 236
+        paddle = 35 + (self.t * 3) % 140
+        frame[paddle:paddle + 16, 140:144] = (92, 186, 92)
+        frame[paddle:paddle + 16, 16:20] = (213, 130, 74)
+        return frame
+
+
+# Compare the Pong notebook's per-frame preprocessing with the wrapper pipeline on synthetic frames
+if __name__ == "__main__":
+    import time
+
+    color = np.array([210, 164, 74]).mean()
+
+    def preprocess_observation(obs):
+        img = obs[35:195:2, ::2]
+        img = img.mean(axis=2)
+        img[img == color] = 0
+        img = (img - 128) / 128 - 1
+        return img.reshape(80, 80, 1)
+
+    # Record the frames first so that only the preprocessing is timed
+    n = 3000
+    source = SyntheticFrames(seed=0)
+    frames = [source.reset()] + [source.step(0)[0] for _ in range(n - 1)]
+
+    start = time.perf_counter()
+    for frame in frames:
+        x = preprocess_observation(frame)
+    old = time.perf_counter() - start
+
+    env = FrameStack(Grayscale(Downsample(Crop(source, rows=slice(35, 195)), 2), erase=(210, 164, 74)), 4)
+    stages = []
+    stage = env
+    while isinstance(stage, ObservationStage):
+        stages.insert(0, stage)
+        stage = stage.env
+    env.reset()
+    start = time.perf_counter()
+    for frame in frames:
+        for stage in stages:
+            frame = stage.observation(frame)
+        stacked = frame
+    new = time.perf_counter() - start
+
+    # Same values as the notebook after the deferred normalization (up to the 1/3 lost by the
+    # integer mean), and the stack is a view of the frame buffer
+    error = np.abs(to_float(stacked[..., -1:], 1 / 128, -2) - x).max()
+    print("per frame: notebook {0:.1f} us, wrappers {1:.1f} us".format(1e6 * old / n, 1e6 * new / n))
+    print("stored per transition: notebook {0} bytes (obs + next_obs, float64), wrappers {1} bytes (4 stacked uint8 frames)".format(
+        2 * x.nbytes, stacked.nbytes))
+    print("max difference after normalization: {0:.4f}, stack copied: {1}".format(
+        error, not np.shares_memory(stacked, env._frames)))
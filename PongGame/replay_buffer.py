@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, capacity, obs_shape, obs_dtype=np.uint8, n_envs=1, filename=None):
+        # Circular buffer of `capacity` rows, each holding one transition per env (n_envs > 1 stores
+        # the rows of a VectorHideAndSeekEnv). Only obs is stored: next_obs of a transition is the
+        # obs of the following row of the same env, so the newest row cannot be sampled until the
+        # next add(). With a filename the observations are memory-mapped to that file.
+        self.capacity = capacity
+        self.n_envs = n_envs
+        self.obs_shape = tuple(obs_shape)
+
+        shape = (capacity, n_envs) + self.obs_shape
+        if filename is None:
+            self.obs = np.zeros(shape, dtype=obs_dtype)
+        else:
+            self.obs = np.lib.format.open_memmap(filename, mode='w+', dtype=obs_dtype, shape=shape)
+        self.actions = np.zeros((capacity, n_envs), dtype=np.int8)
+        self.rewards = np.zeros((capacity, n_envs), dtype=np.float32)
+        self.dones = np.zeros((capacity, n_envs), dtype=bool)
+
+        self._next = 0
+        self._rows = 0
+
+    def __len__(self):
+        # Number of transitions that can be sampled
+        return max(self._rows - 1, 0) * self.n_envs
+
+    def add(self, obs, action, reward, done):
+        row = self._next
+        if self.n_envs == 1:
+            self.obs[row, 0] = obs
+        else:
+            self.obs[row] = obs
+        self.actions[row] = action
+        self.rewards[row] = reward
+        self.dones[row] = done
+        self._next = (row + 1) % self.capacity
+        self._rows = min(self._rows + 1, self.capacity)
+        return row
+
+    def sample_indices(self, batch_size, rng=None):
+        # Flat indices row * n_envs + env of sampleable transitions (all rows but the newest)
+        n = len(self)
+        if n == 0:
+            raise ValueError("not enough transitions in the buffer")
+        oldest = (self._next - self._rows) % self.capacity
+        if rng is None:
+            i = np.random.randint(n, size=batch_size)
+        else:
+            i = rng.integers(n, size=batch_size)
+        rows = (oldest + i // self.n_envs) % self.capacity
+        return rows * self.n_envs + i % self.n_envs
+
+    def get(self, indices):
+        rows, envs = np.divmod(indices, self.n_envs)
+        next_rows = (rows + 1) % self.capacity
+        return (self.obs[rows, envs], self.actions[rows, envs], self.obs[next_rows, envs],
+                self.rewards[rows, envs], self.dones[rows, envs])
+
+    def sample(self, batch_size, rng=None):
+        # Same order as sample_memories in dqn_algorithm.ipynb: obs, action, next_obs, reward, done
+        return self.get(self.sample_indices(batch_size, rng))